@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+compare memory taken by a list of Color objects and by ColorArray
+
+    python benchmarks/memory.py [count]
+"""
+
+import os
+import sys
+import tracemalloc
+
+# run from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from color_scheme_generator.color_scheme_generator import (  # noqa: E402
+    Color, ColorArray)
+
+
+def colors(count):
+    for i in range(count):
+        yield Color(hsv=(i % 360 / 360, 0.5, 0.75))
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main(count=100000):
+    layouts = (
+        ('list of Color', lambda: list(colors(count))),
+        ('list of Color, hex cached', lambda: [
+            color for color in colors(count) if color.hex]),
+        ('ColorArray float64', lambda: ColorArray(colors(count))),
+        ('ColorArray float64, hex view', lambda: [
+            array for array in [ColorArray(colors(count))] if array.hex]),
+        ('ColorArray float32', lambda: ColorArray(colors(count), 'f')),
+    )
+    for name, build in layouts:
+        size = measure(build)
+        print("%-28s %10d bytes %8.1f bytes/color" % (
+            name, size, size / count))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+time the conversion hot paths and compare them with a stored baseline
+
+    python benchmarks/run.py                   # compare with baseline.json
+    python benchmarks/run.py --save-baseline   # record a new baseline
+    python benchmarks/run.py --output results.json --sizes 1 1000
+
+every benchmark runs over inputs of each size and reports nanoseconds per
+item, size 1 is the per-call cost, larger sizes the bulk cost.
+a benchmark slower than baseline * tolerance makes the run exit with 1.
+timings are compared relative to a fixed pure Python calibration loop
+timed in the same run, so a slower or busier machine does not read as a
+regression, and a benchmark over the tolerance is measured again before
+it is reported. timings still depend on the machine and Python version,
+record the baseline on the box that runs the comparison. saving the
+baseline of some benchmarks keeps the entries of the others.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from random import Random
+
+# run from a checkout without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from color_scheme_generator import utils, paletton, color_spaces  # noqa: E402
+from color_scheme_generator.color_scheme_generator import (  # noqa: E402
+    Color, generate_palette)
+from color_scheme_generator.constants import (  # noqa: E402
+    COLOR_WHEEL, COLOR_WHEEL_V3, PRESETS_V3)
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+SIZES = (1, 1000, 10000)
+
+
+def hex_to_rgb(rnd, size):
+    colors = ['#%06X' % rnd.randrange(1 << 24) for _ in range(size)]
+
+    def run():
+        utils.set_hex_cache_size()
+        for color in colors:
+            utils.hex_to_rgb(color)
+    return run
+
+
+def rgb_to_hex(rnd, size):
+    colors = [(rnd.random(), rnd.random(), rnd.random()) for _ in range(size)]
+
+    def run():
+        utils.set_hex_cache_size()
+        for color in colors:
+            utils.rgb_to_hex(color)
+    return run
+
+
+def ryb_to_rgb(rnd, size):
+    colors = [(rnd.random(), rnd.random(), rnd.random()) for _ in range(size)]
+
+    def run():
+        for color in colors:
+            utils.ryb_to_rgb(*color)
+    return run
+
+
+def ryb_to_rgb_nishita(rnd, size):
+    colors = [(rnd.random(), rnd.random(), rnd.random()) for _ in range(size)]
+
+    def run():
+        for color in colors:
+            utils.ryb_to_rgb_nishita(*color)
+    return run
+
+
+def from_paletton_hue_to_rgbvs(rnd, size):
+    hues = [rnd.randrange(360) for _ in range(size)]
+
+    def run():
+        for hue in hues:
+            utils.from_paletton_hue_to_rgbvs(hue, COLOR_WHEEL)
+    return run
+
+
+def expand_color_wheel(rnd, size):
+    def run():
+        for _ in range(size):
+            paletton.expand_color_wheel(COLOR_WHEEL_V3)
+    return run
+
+
+def variations_generator(rnd, size):
+    colors = [tuple(rnd.randrange(256) for _ in range(3))
+              for _ in range(size)]
+    preset = PRESETS_V3['full_colors']
+
+    def run():
+        for rgb in colors:
+            for _ in paletton.variations_generator(
+                    rgb, paletton.make_sv_variations(rgb, preset)):
+                pass
+    return run
+
+
+def make_tones(rnd, size):
+    colors = [tuple(rnd.randrange(256) for _ in range(3))
+              for _ in range(size)]
+    preset = PRESETS_V3['full_colors']
+
+    def run():
+        for rgb in colors:
+            paletton.make_tones(rgb, preset)
+    return run
+
+
+def rgb_to_lab(rnd, size):
+    colors = [(rnd.random(), rnd.random(), rnd.random()) for _ in range(size)]
+
+    def run():
+        for color in colors:
+            color_spaces.rgb_to_lab(color)
+    return run
+
+
+def sweep(rnd, size):
+    def run():
+        for _ in range(size):
+            utils.sweep(0, 360, 1, 'default')
+    return run
+
+
+def generate_palette_(rnd, size):
+    colors = [Color(hsv=(rnd.random(), rnd.random(), rnd.random()))
+              for _ in range(size)]
+
+    def run():
+        for color in colors:
+            for _ in generate_palette(color, 'triad').hex_values():
+                pass
+    return run
+
+
+BENCHMARKS = dict(
+    hex_to_rgb=hex_to_rgb,
+    rgb_to_hex=rgb_to_hex,
+    ryb_to_rgb=ryb_to_rgb,
+    ryb_to_rgb_nishita=ryb_to_rgb_nishita,
+    from_paletton_hue_to_rgbvs=from_paletton_hue_to_rgbvs,
+    expand_color_wheel=expand_color_wheel,
+    variations_generator=variations_generator,
+    make_tones=make_tones,
+    generate_palette=generate_palette_,
+    rgb_to_lab=rgb_to_lab,
+    sweep=sweep,
+)
+
+# these build the whole wheel per item, keep them short
+MAX_SIZES = dict(expand_color_wheel=100, sweep=100)
+
+
+def measure(name, size, repeat=5, min_time=0.05):
+    """
+    best nanoseconds per item out of repeat runs
+    """
+
+    return _best(BENCHMARKS[name](Random(0), size), size, repeat, min_time)
+
+
+def _best(run, size, repeat, min_time):
+    number = 1
+    while timeit.timeit(run, number=number) < min_time:
+        number *= 2
+    best = min(timeit.repeat(run, number=number, repeat=repeat))
+    return round(best / number / size * 1e9, 1)
+
+
+def calibrate(repeat=5, size=1000):
+    """
+    best nanoseconds per step of a fixed pure Python loop
+    """
+
+    def run():
+        total = 0
+        for k in range(size):
+            total += k * k % 7
+        return total
+    return _best(run, size, repeat, min_time=0.05)
+
+
+def run_all(names, sizes, repeat):
+    results = {}
+    for name in names:
+        for size in sizes:
+            size = min(size, MAX_SIZES.get(name, size))
+            key = '%s[%d]' % (name, size)
+            if key not in results:
+                results[key] = measure(name, size, repeat)
+                print("%-36s %12.0f ns/item" % (key, results[key]),
+                      file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, tolerance, scale=1.):
+    """
+    list of (key, ns, baseline ns) slower than baseline * tolerance,
+    baseline timings are multiplied by scale first
+    """
+
+    return [
+        (key, ns, baseline[key] * scale)
+        for key, ns in sorted(results.items())
+        if key in baseline and ns > baseline[key] * scale * tolerance
+    ]
+
+
+def remeasure(results, keys, repeat):
+    """
+    measure the benchmarks of keys again, keep the best timing
+    """
+
+    for key in keys:
+        name, _, size = key[:-1].rpartition('[')
+        results[key] = min(results[key], measure(name, int(size), repeat))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('names', nargs='*',
+                        help="benchmarks to run, all by default: %s" % (
+                            ', '.join(sorted(BENCHMARKS))))
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help="allowed slowdown factor, default 1.5")
+    parser.add_argument('--retries', type=int, default=2,
+                        help="times a benchmark over the tolerance is "
+                             "measured again, default 2")
+    parser.add_argument('--output', help="write results as json here")
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error("unknown benchmarks: %s" % ', '.join(sorted(unknown)))
+
+    calibration = calibrate(args.repeat)
+    results = run_all(args.names or sorted(BENCHMARKS), args.sizes,
+                      args.repeat)
+    # the machine may have slowed down or sped up while running
+    calibration = min(calibration, calibrate(args.repeat))
+    print("%-36s %12.1f ns/step" % ('calibration', calibration),
+          file=sys.stderr)
+    report = dict(
+        python=platform.python_version(),
+        machine=platform.machine(),
+        calibration=calibration,
+        results=results,
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    # baseline timings in the units of this run
+    scale = 1.
+    if baseline and baseline.get('calibration'):
+        scale = calibration / baseline['calibration']
+
+    if args.save_baseline:
+        if baseline and args.names:
+            # keep the other benchmarks, in the units of the baseline
+            baseline['results'].update(
+                (key, round(ns / scale, 1)) for key, ns in results.items())
+            report = baseline
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return 0
+
+    if baseline is None:
+        print("no baseline at %s, run with --save-baseline" % args.baseline,
+              file=sys.stderr)
+        return 0
+    regressions = compare(results, baseline['results'], args.tolerance,
+                          scale)
+    for _ in range(args.retries):
+        if not regressions:
+            break
+        remeasure(results, [key for key, _, _ in regressions], args.repeat)
+        regressions = compare(results, baseline['results'], args.tolerance,
+                              scale)
+    for key, ns, base_ns in regressions:
+        print("REGRESSION %s: %.0f ns/item, baseline %.0f ns/item (x%.2f)" % (
+            key, ns, base_ns, ns / base_ns), file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+nearest color search over a catalog of named colors
+
+colors are indexed on a uniform grid of cubic cells in CIELAB, distances
+are CIE76 delta E. a query scans cells in growing shells around its own
+cell and stops once no unscanned cell can hold a closer color, so only
+a handful of cells is visited instead of the whole catalog
+
+the index is a few flat arrays, save() writes them to a file that
+ColorCatalog.load() reads back without rebuilding
+"""
+
+import heapq
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from math import sqrt
+
+from .color_spaces import rgb8_to_lab
+
+CatalogMatch = namedtuple("CatalogMatch", ('name', 'hex', 'distance'))
+
+MAGIC = b'CSGCAT01'
+# magic, colors, grid size along L, a and b, cell size, grid origin
+HEADER = struct.Struct('<8sIIIId3d')
+
+
+def parse_hex(color):
+    """
+    >>> parse_hex('#F0a'), parse_hex('00FF80')
+    ((255, 0, 170), (0, 255, 128))
+    """
+    digits = color.lstrip('#')
+    if len(digits) == 3:
+        digits = ''.join(k * 2 for k in digits)
+    if len(digits) != 6:
+        raise ValueError("%r is not a hex color" % (color,))
+    return tuple(bytes.fromhex(digits))
+
+
+class ColorCatalog:
+    """
+    catalog of named colors indexed for nearest color queries
+
+    colors are hex strings or (name, hex string) pairs, hex strings
+    alone are their own names. cell_size is the grid cell edge in delta E,
+    by default it is picked from the number of colors
+
+    >>> catalog = ColorCatalog([('red', '#FF0000'), ('navy', '#000080'),
+    ...                         ('white', '#FFFFFF'), '#808080'])
+    >>> len(catalog)
+    4
+    >>> match, = catalog.nearest('#EE1111')
+    >>> match.name, match.hex, round(match.distance, 2)
+    ('red', '#FF0000', 9.98)
+    >>> [match.name for match in catalog.nearest('#999999', k=2)]
+    ['#808080', 'white']
+    """
+
+    def __init__(self, colors=(), cell_size=None):
+        names = []
+        packed = array('I')
+        labs = []
+        for item in colors:
+            name, color = (item, item) if isinstance(item, str) else item
+            if '\n' in name:
+                raise ValueError("color names must be single lines")
+            r, g, b = rgb = parse_hex(color)
+            names.append(name)
+            packed.append((r << 16) | (g << 8) | b)
+            labs.append(rgb8_to_lab(rgb))
+
+        origin = tuple(min((lab[k] for lab in labs), default=0.)
+                       for k in range(3))
+        extent = tuple(max((lab[k] for lab in labs), default=0.) - origin[k]
+                       for k in range(3))
+        if cell_size is None:
+            # about 4 colors per cell of the bounding box, the sRGB gamut
+            # fills about a quarter of it. 100k colors get 2.1 wide cells
+            volume = max(extent[0], 1.) * max(extent[1], 1.) * max(
+                extent[2], 1.)
+            cell_size = max((volume / (4 * max(len(labs), 1))) ** (1 / 3), 1.)
+        dims = tuple(int(extent[k] // cell_size) + 1 for k in range(3))
+        self._cell_size, self._origin, self._dims = cell_size, origin, dims
+        cells = [self._cell_index(self._cell_of(lab)) for lab in labs]
+        order = sorted(range(len(labs)), key=cells.__getitem__)
+
+        # cell c holds colors starts[c] to starts[c + 1] in cell order
+        starts = array('I', bytes(4 * (dims[0] * dims[1] * dims[2] + 1)))
+        for cell in cells:
+            starts[cell + 1] += 1
+        for c in range(1, len(starts)):
+            starts[c] += starts[c - 1]
+        self._starts = starts
+        self._names = [names[i] for i in order]
+        self._packed = array('I', (packed[i] for i in order))
+        self._lab = array('d', (k for i in order for k in labs[i]))
+
+    def __len__(self):
+        return len(self._names)
+
+    def _cell_of(self, lab):
+        return tuple(
+            min(max(int((lab[k] - self._origin[k]) // self._cell_size), 0),
+                self._dims[k] - 1)
+            for k in range(3))
+
+    def _cell_index(self, cell):
+        return (cell[0] * self._dims[1] + cell[1]) * self._dims[2] + cell[2]
+
+    def nearest_lab(self, lab, k=1):
+        """
+        list of the k catalog colors closest to a CIELAB triple,
+        closest first
+        """
+
+        if not self._names:
+            return []
+        k = min(k, len(self._names))
+        lightness, a, b = lab
+        cx, cy, cz = self._cell_of(lab)
+        nx, ny, nz = self._dims
+        starts, labs = self._starts, self._lab
+        # max-heap of (-squared distance, position) of the best k so far
+        best = []
+        max_shell = max(cx, nx - 1 - cx, cy, ny - 1 - cy, cz, nz - 1 - cz)
+        for shell in range(max_shell + 1):
+            for i in range(max(cx - shell, 0), min(cx + shell, nx - 1) + 1):
+                for j in range(max(cy - shell, 0),
+                               min(cy + shell, ny - 1) + 1):
+                    if abs(i - cx) == shell or abs(j - cy) == shell:
+                        zs = range(max(cz - shell, 0),
+                                   min(cz + shell, nz - 1) + 1)
+                    else:
+                        zs = [z for z in (cz - shell, cz + shell)
+                              if 0 <= z < nz]
+                    row = (i * ny + j) * nz
+                    for z in zs:
+                        for p in range(starts[row + z], starts[row + z + 1]):
+                            dl = labs[3 * p] - lightness
+                            da = labs[3 * p + 1] - a
+                            db = labs[3 * p + 2] - b
+                            item = -(dl * dl + da * da + db * db), p
+                            if len(best) < k:
+                                heapq.heappush(best, item)
+                            elif item > best[0]:
+                                heapq.heapreplace(best, item)
+            # colors outside the scanned shells are at least this far
+            reach = shell * self._cell_size
+            if len(best) == k and -best[0][0] <= reach * reach:
+                break
+        return [CatalogMatch(self._names[p], '#%06X' % self._packed[p],
+                             sqrt(-d2))
+                for d2, p in sorted(best, reverse=True)]
+
+    def nearest(self, color, k=1):
+        """
+        list of the k catalog colors closest to color, a hex string or
+        a Color, closest first
+        """
+
+        if isinstance(color, str):
+            return self.nearest_lab(rgb8_to_lab(parse_hex(color)), k)
+        return self.nearest_lab(color.lab, k)
+
+    def nearest_many(self, colors, k=1):
+        """
+        nearest() of every color, repeated colors are searched once
+        """
+
+        found = {}
+        result = []
+        for color in colors:
+            key = color if isinstance(color, str) else color.hex
+            if key not in found:
+                found[key] = self.nearest(color, k)
+            result.append(found[key])
+        return result
+
+    def nearest_palette(self, palette, k=1):
+        """
+        tuple of nearest() rows for the tone rows of a Palette
+
+        >>> from .color_scheme_generator import Color, generate_palette
+        >>> catalog = ColorCatalog(['#FFAAAA', '#A83939', '#540000'])
+        >>> palette = generate_palette(Color(hex='#FF0000'))
+        >>> [match.hex for match, in catalog.nearest_palette(palette)[0]]
+        ['#FFAAAA', '#A83939', '#A83939', '#A83939', '#540000']
+        """
+
+        rows = tuple(palette.hex_values())
+        matches = iter(self.nearest_many(
+            [tone for tones in rows for tone in tones], k))
+        return tuple(tuple(next(matches) for _ in tones) for tones in rows)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(self), *self._dims,
+                                self._cell_size, *self._origin))
+            for values in (self._starts, self._packed, self._lab):
+                f.write(values.tobytes())
+            f.write('\n'.join(self._names).encode('utf-8'))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """
+        read a catalog written by save()
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'catalog')
+        >>> catalog = ColorCatalog.load(ColorCatalog(
+        ...     [('red', '#FF0000'), ('navy', '#000080')]).save(path))
+        >>> catalog.nearest('#000066')[0].name
+        'navy'
+        """
+
+        if sys.byteorder != 'little':
+            raise ValueError("color catalog requires a little-endian host")
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            magic, count, nx, ny, nz, cell_size, *origin = HEADER.unpack_from(
+                data)
+        except struct.error:
+            magic = None
+        if magic != MAGIC:
+            raise ValueError("%s is not a color catalog" % path)
+        catalog = cls.__new__(cls)
+        catalog._cell_size, catalog._origin = cell_size, tuple(origin)
+        catalog._dims = nx, ny, nz
+        offset = HEADER.size
+        for name, typecode, size in (('_starts', 'I', nx * ny * nz + 1),
+                                     ('_packed', 'I', count),
+                                     ('_lab', 'd', 3 * count)):
+            values = array(typecode)
+            values.frombytes(
+                data[offset:offset + size * values.itemsize])
+            offset += size * values.itemsize
+            setattr(catalog, name, values)
+        names = data[offset:].decode('utf-8')
+        catalog._names = names.split('\n') if count else []
+        if len(catalog._names) != count or len(catalog._lab) != 3 * count:
+            raise ValueError("%s is truncated" % path)
+        return catalog
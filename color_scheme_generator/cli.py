@@ -1,14 +1,209 @@
 # -*- coding: utf-8 -*-
 
+import re
+
 import click
 
+from .constants import PRESETS_V3, SCHEMES
+
+HEX_DIGITS = re.compile(r'[0-9A-Fa-f]{3}|[0-9A-Fa-f]{6}')
 
-@click.command()
+
+@click.group()
 def main(args=None):
     """Console script for color_scheme_generator"""
-    click.echo("Replace this message by putting your code into "
-               "color_scheme_generator.cli.main")
-    click.echo("See click documentation at http://click.pocoo.org/")
+
+
+def read_colors(lines):
+    for line_number, line in enumerate(lines, 1):
+        color = line.strip()
+        if not color:
+            continue
+        if not HEX_DIGITS.fullmatch(color.lstrip('#')):
+            click.echo("line %d: skipping %r, not a hex color" % (
+                line_number, color), err=True)
+            continue
+        yield color
+
+
+@main.command()
+@click.argument('input', type=click.File('r'), default='-')
+@click.option('--engine', type=click.Choice(['paletton', 'hsv']),
+              default='paletton', show_default=True)
+@click.option('--scheme', type=click.Choice(sorted(SCHEMES)),
+              default='mono', show_default=True)
+@click.option('--preset', type=click.Choice(sorted(PRESETS_V3)),
+              default='pastel', show_default=True)
+@click.option('--format', 'output_format', type=click.Choice(['json', 'csv']),
+              default='json', show_default=True,
+              help="json writes one object per line (NDJSON).")
+@click.option('--flush-every', default=1000, show_default=True,
+              help="Flush output after this many records.")
+@click.option('--workers', default=1, show_default=True,
+              help="Worker processes generating palettes.")
+@click.option('--chunksize', default=1024, show_default=True,
+              help="Colors sent to a worker at once.")
+@click.option('--stats', is_flag=True,
+              help="Report throughput on stderr when done.")
+@click.option('--cache', 'cache_path', type=click.Path(dir_okay=False),
+              help="Reuse and store palettes in this sqlite cache.")
+def generate(input, engine, scheme, preset, output_format, flush_every,
+             workers, chunksize, stats, cache_path):
+    """Generate a palette for every hex color read from INPUT, line by line
+
+    INPUT defaults to stdin. Records are written as soon as they are
+    generated, so memory use does not depend on the input size. Output
+    order follows input order for any number of workers.
+    """
+
+    out = click.open_file('-', 'w')
+    if output_format == 'csv':
+        import csv
+        writer = csv.writer(out, lineterminator='\n')
+
+        def write(color, rows):
+            writer.writerow((color,) + sum(rows, ()))
+    else:
+        import json
+
+        def write(color, rows):
+            out.write(json.dumps(dict(color=color, palette=rows)) + '\n')
+
+    from .parallel import generate_palettes
+
+    cache = None
+    if cache_path:
+        from .disk_cache import PaletteCache
+        cache = PaletteCache(cache_path)
+    report = {}
+    records = generate_palettes(
+        read_colors(input), workers, chunksize, engine, scheme, preset, report,
+        cache)
+    try:
+        for count, (color, rows) in enumerate(records, 1):
+            write(color, rows)
+            if count % flush_every == 0:
+                out.flush()
+        out.flush()
+    finally:
+        # keep the palettes generated so far when writing fails
+        if cache is not None:
+            cache.close()
+    if stats:
+        click.echo("%(count)d colors in %(seconds).2fs, "
+                   "%(colors_per_second).0f colors/s" % report, err=True)
+
+
+@main.command('build-hue-table')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--samples', default=10000, show_default=True,
+              help="Random rgb triples checked against the scalar lookup.")
+def build_hue_table(path, samples):
+    """Build the rgb -> paletton hue table used by HueTable"""
+    from .hue_table import build_hue_table, HueTable, validate_hue_table
+    from .paletton import Paletton
+
+    build_hue_table(path)
+    with HueTable(path) as table:
+        mismatches = validate_hue_table(table, Paletton(), samples)
+    if mismatches:
+        raise click.ClickException(
+            "%d of %d samples differ from from_rgb_to_paletton_hue, "
+            "first: %r" % (len(mismatches), samples, mismatches[0]))
+    click.echo("%s: %d samples validated" % (path, samples))
+
+
+@main.command('warm-cache')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--preset', 'presets', type=click.Choice(sorted(PRESETS_V3)),
+              multiple=True, help="Presets to store, all by default.")
+@click.option('--max-entries', default=1000000, show_default=True,
+              help="Evict the oldest palettes beyond this many.")
+def warm_cache(path, presets, max_entries):
+    """Store paletton palettes for all 360 hues, presets and schemes"""
+    from .disk_cache import PaletteCache, warm_cache
+
+    with PaletteCache(path, max_entries) as cache:
+        count = warm_cache(cache, presets or sorted(PRESETS_V3))
+    click.echo("%s: %d palettes stored" % (path, count))
+
+
+@main.command()
+@click.argument('image', type=click.Path(exists=True, dir_okay=False))
+@click.option('--count', default=3, show_default=True,
+              help="Dominant hues to report.")
+@click.option('--scheme', type=click.Choice(sorted(SCHEMES)),
+              help="Build this scheme on the most dominant hue instead of "
+                   "a row per dominant hue.")
+@click.option('--preset', type=click.Choice(sorted(PRESETS_V3)),
+              default='pastel', show_default=True)
+def extract(image, count, scheme, preset):
+    """Print a palette of the dominant hues of a PPM or PAM IMAGE
+
+    One line per palette row: the hex tones separated by spaces.
+    """
+    from .image import image_palette
+
+    try:
+        palette = image_palette(image, scheme, preset, count)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for tones in palette.hex_values():
+        click.echo(' '.join(tones))
+
+
+@main.command('build-catalog')
+@click.argument('input', type=click.File('r'))
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+def build_catalog(input, path):
+    """Index the colors of INPUT for nearest color search, write to PATH
+
+    INPUT has one color per line, a hex value optionally followed by a
+    comma and the color name.
+    """
+    from .catalog import ColorCatalog
+
+    def entries():
+        for line in input:
+            color, _, name = line.strip().partition(',')
+            if color:
+                yield name.strip() or color, color
+    try:
+        catalog = ColorCatalog(entries())
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    catalog.save(path)
+    click.echo("%s: %d colors indexed" % (path, len(catalog)))
+
+
+@main.command()
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=8000, show_default=True)
+@click.option('--engine', type=click.Choice(['paletton', 'hsv']),
+              default='paletton', show_default=True)
+@click.option('--max-batch', default=256, show_default=True,
+              help="Colors generated in one executor call at most.")
+@click.option('--max-delay', default=0.001, show_default=True,
+              help="Seconds a request waits for others to batch with.")
+@click.option('--max-pending', default=1024, show_default=True,
+              help="Requests queued before answering 503.")
+def serve(host, port, engine, max_batch, max_delay, max_pending):
+    """Serve palettes over HTTP: GET /palette?color=FF0000 and /metrics"""
+    import asyncio
+    from .service import PaletteService, serve_http
+
+    async def run():
+        service = PaletteService(engine, max_batch, max_delay, max_pending)
+        server = await serve_http(service, host, port)
+        click.echo("serving on http://%s:%d" % (
+            host, server.sockets[0].getsockname()[1]), err=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
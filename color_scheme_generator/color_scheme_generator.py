@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
 
 
+from array import array
 from colorsys import hsv_to_rgb, rgb_to_hsv
 from .utils import hex_to_rgb, rgb_to_hex
+from .paletton import get_paletton, get_scheme, from_hsv_hue_to_paletton_hue
 from .constants import (
     RGB_tuple,
     HSV_tuple,
-    SCHEMES,
-    PRESETS,
+    PRESETS_V3,
 )
 
 
@@ -30,7 +31,15 @@ class Color:
     0.345
     >>> round(mycolor.hsv.saturation, 3)
     0.655
+    >>> round(Color(hex='#808080').lab.lightness, 2)
+    53.59
+    >>> round(Color().oklab.lightness, 3)
+    0.628
     """
+
+    # everything but hsv is derived from hsv on first access and kept
+    __slots__ = ('__hsv', '__rgb', '__hex', '__lab', '__oklab')
+
     def __init__(self, **kwargs):
         if 'hsv' in kwargs:
             self.from_hsv(kwargs['hsv'])
@@ -40,7 +49,7 @@ class Color:
             self.from_hex(kwargs['hex'])
         else:
             # default - red
-            self.__hsv = HSV_tuple(0, 1, 1)
+            self.from_hsv((0, 1, 1))
 
     def print(self, print_mode='full', round_ndigits=None):
         hex_line = self.hex
@@ -50,8 +59,10 @@ class Color:
             round_ndigits)
         rgb_data = self.rgb if round_ndigits is None else self.round_rgb(
             round_ndigits)
-        hsv_line = hsv_tmpl.format(*hsv_data)
-        rgb_line = rgb_tmpl.format(*rgb_data)
+        # rounded values print the same whether stored as int or float
+        fmt = str if round_ndigits is None else '{0:g}'.format
+        hsv_line = hsv_tmpl.format(*map(fmt, hsv_data))
+        rgb_line = rgb_tmpl.format(*map(fmt, rgb_data))
 
         full_line = dict(
             full=(hex_line, hsv_line, rgb_line),
@@ -62,25 +73,52 @@ class Color:
 
     def from_hsv(self, hsv):
         self.__hsv = HSV_tuple(*hsv)
+        self.__rgb = self.__hex = self.__lab = self.__oklab = None
+
+    @classmethod
+    def _from_derived(cls, hsv, rgb=None, hex_color=None):
+        # Color of hsv whose rgb and hex are already known, for ColorArray
+        color = cls.__new__(cls)
+        color.from_hsv(hsv)
+        color.__rgb, color.__hex = rgb, hex_color
+        return color
 
     def from_rgb(self, rgb):
-        self.__hsv = HSV_tuple(*rgb_to_hsv(*RGB_tuple(*rgb)))
+        self.from_hsv(rgb_to_hsv(*RGB_tuple(*rgb)))
 
     def from_hex(self, hex_color):
         self.from_rgb(hex_to_rgb(hex_color))
 
     @property
     def rgb(self):
-        return RGB_tuple(*hsv_to_rgb(*self.hsv))
+        if self.__rgb is None:
+            self.__rgb = RGB_tuple(*hsv_to_rgb(*self.hsv))
+        return self.__rgb
 
     @property
     def hex(self):
-        return rgb_to_hex(self.rgb)
+        if self.__hex is None:
+            self.__hex = rgb_to_hex(self.rgb)
+        return self.__hex
 
     @property
     def hsv(self):
         return self.__hsv
 
+    @property
+    def lab(self):
+        if self.__lab is None:
+            from .color_spaces import rgb_to_lab
+            self.__lab = rgb_to_lab(self.rgb)
+        return self.__lab
+
+    @property
+    def oklab(self):
+        if self.__oklab is None:
+            from .color_spaces import rgb_to_oklab
+            self.__oklab = rgb_to_oklab(self.rgb)
+        return self.__oklab
+
     def round_hsv(self, ndigits):
         return HSV_tuple(*(round(k, ndigits) for k in self.hsv))
 
@@ -88,13 +126,115 @@ class Color:
         return RGB_tuple(*(round(k, ndigits) for k in self.rgb))
 
 
+class ColorArray:
+    """
+    compact list of colors, keeps hsv triples in a flat array.array
+    instead of Color objects, Color is created on access.
+    rgb and hex of all colors are computed once, on first use of the
+    rgb and hex views, and the Colors created afterwards share them.
+    typecode='f' stores hsv as float32, which halves memory but changes
+    the rgb values compared with Color
+
+    >>> colors = ColorArray([Color(), Color(hex='#FF5858')])
+    >>> len(colors)
+    2
+    >>> colors.append(Color(rgb=(1.0, 1.0, 1.0)))
+    >>> colors.hex
+    ('#FF0000', '#FF5858', '#FFFFFF')
+    >>> colors[-1].hex
+    '#FFFFFF'
+    >>> colors[1].rgb == Color(hex='#FF5858').rgb
+    True
+    """
+
+    __slots__ = ('__hsv', '__rgb', '__hex')
+
+    def __init__(self, colors=(), typecode='d'):
+        self.__hsv = array(typecode)
+        self.__rgb = self.__hex = None
+        for color in colors:
+            self.append(color)
+
+    def append(self, color):
+        self.__hsv.extend(color.hsv)
+        self.__rgb = self.__hex = None
+
+    def __len__(self):
+        return len(self.__hsv) // 3
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ColorArray index out of range")
+        return Color._from_derived(
+            self.__hsv[3*index:3*index + 3],
+            self.__rgb and self.__rgb[index],
+            self.__hex and self.__hex[index])
+
+    def __iter__(self):
+        hsv, rgb, hex_values = self.__hsv, self.__rgb, self.__hex
+        for i in range(len(self)):
+            yield Color._from_derived(
+                hsv[3*i:3*i + 3], rgb and rgb[i],
+                hex_values and hex_values[i])
+
+    @property
+    def rgb(self):
+        """
+        tuple of the RGB_tuple of every color
+        """
+        if self.__rgb is None:
+            hsv = self.__hsv
+            self.__rgb = tuple(
+                RGB_tuple(*hsv_to_rgb(*hsv[i:i + 3]))
+                for i in range(0, len(hsv), 3))
+        return self.__rgb
+
+    @property
+    def hex(self):
+        """
+        tuple of the hex string of every color
+        """
+        if self.__hex is None:
+            rgb, hsv = self.__rgb, self.__hsv
+            if rgb is None:
+                # without keeping the rgb view
+                rgb = (hsv_to_rgb(*hsv[i:i + 3])
+                       for i in range(0, len(hsv), 3))
+            self.__hex = tuple(map(rgb_to_hex, rgb))
+        return self.__hex
+
+    def nbytes(self):
+        return self.__hsv.buffer_info()[1] * self.__hsv.itemsize
+
+
 def generate_from_scheme(color, scheme):
-    scheme = SCHEMES[scheme]
-    yield color
+    """
+    yield base colors of the scheme, hues are moved along the paletton
+    wheel by the scheme offsets, saturation and value are kept
+    scheme is a name from SCHEMES or a tuple of hue offsets (free-style)
+
+    >>> for color in generate_from_scheme(Color(hex='#FF5858'), 'triad'):
+    ...     print(color.hex)
+    #FF5858
+    #C8FF58
+    #58FFFF
+    """
+
+    paletton = get_paletton()
+    hue, saturation, value = color.hsv
+    paletton_hue = from_hsv_hue_to_paletton_hue(hue, paletton)
+    for offset in get_scheme(scheme):
+        if offset == 0:
+            yield color
+        else:
+            wheel_hue = paletton.WHEEL_HUES[(paletton_hue + offset) % 360]
+            yield Color(hsv=HSV_tuple(wheel_hue, saturation, value))
 
 
 def generate_from_preset(color, preset):
-    for saturation_ratio, value_ratio in PRESETS[preset]:
+    for saturation_ratio, value_ratio in PRESETS_V3[preset]:
         hue, saturation, value = color.hsv
         yield Color(hsv=HSV_tuple(
             hue,
@@ -104,34 +244,259 @@ def generate_from_preset(color, preset):
 
 
 class Palette:
+    """
+    tones of every base color of a scheme
+
+    the tones are generated on first access and stored compactly:
+    hsv values in a ColorArray and packed 24-bit rgb integers in an
+    array('I') that is exported without copying by buffer(). use
+    buffer() to export, memoryview(palette) works from Python 3.12 on
+    iterating yields a tuple of tone colors per base color,
+    palette[base] is such a tuple and palette[base, tone] a single color
+
+    >>> palette = generate_palette(Color(hex='#FF5858'), 'complementary')
+    >>> len(palette)
+    2
+    >>> palette[1, 2].hex
+    '#60A860'
+    >>> [color.hex for color in palette[0]]
+    ['#FFC7C7', '#D48E8E', '#A86060', '#803A3A', '#541D1D']
+    >>> next(palette.hex_values())
+    ('#FFC7C7', '#D48E8E', '#A86060', '#803A3A', '#541D1D')
+    >>> ['%06X' % k for k in palette.buffer()[:2]]
+    ['FFC7C7', 'D48E8E']
+    """
+
+    __slots__ = ('__palette', '__colors', '__packed', '__offsets',
+                 '__luminance')
+
     def __init__(self, palette):
         self.__palette = palette
+        self.__colors = self.__luminance = None
 
-    def print_hex_values(self):
+    def __materialize(self):
+        colors = ColorArray(typecode='d')
+        offsets = array('I', [0])
+        packed = array('I')
         for tones in self.__palette:
+            for color in tones:
+                colors.append(color)
+                r, g, b = (round(k * 255) for k in color.rgb)
+                packed.append((r << 16) | (g << 8) | b)
+            offsets.append(len(colors))
+        self.__colors, self.__packed, self.__offsets = colors, packed, offsets
+        self.__palette = None
+
+    def __row(self, base):
+        if base < 0:
+            base += len(self)
+        if not 0 <= base < len(self):
+            raise IndexError("Palette index out of range")
+        return self.__offsets[base], self.__offsets[base + 1]
+
+    def __len__(self):
+        if self.__colors is None:
+            self.__materialize()
+        return len(self.__offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            base, tone = index
+            start, stop = self.__row(base)
+            if not -(stop - start) <= tone < stop - start:
+                raise IndexError("Palette tone index out of range")
+            return self.__colors[(start if tone >= 0 else stop) + tone]
+        start, stop = self.__row(index)
+        return tuple(self.__colors[k] for k in range(start, stop))
+
+    def __iter__(self):
+        for base in range(len(self)):
+            yield self[base]
+
+    def buffer(self):
+        """
+        memoryview of packed 0xRRGGBB tones, rows follow each other
+        """
+        if self.__colors is None:
+            self.__materialize()
+        return memoryview(self.__packed)
+
+    def __buffer__(self, flags):
+        # buffer protocol of Python 3.12 and later, ignored before
+        return self.buffer()
+
+    def tones(self):
+        """
+        yield tuple of tone colors for every base color of the scheme
+        """
+        return iter(self)
+
+    def hex_values(self):
+        """
+        yield tuple of tone hex values for every base color of the scheme
+        """
+        if self.__colors is None:
+            self.__materialize()
+        packed, offsets = self.__packed, self.__offsets
+        for base in range(len(offsets) - 1):
+            yield tuple('#%06X' % packed[k]
+                        for k in range(offsets[base], offsets[base + 1]))
+
+    def luminance(self):
+        """
+        array('d') of the WCAG relative luminance of every tone, in
+        buffer() order, computed once from the 8-bit tone values
+        """
+
+        if self.__luminance is None:
+            from .color_spaces import LUMINANCE8
+            red, green, blue = LUMINANCE8
+            self.__luminance = array('d', (
+                red[k >> 16] + green[(k >> 8) & 0xFF] + blue[k & 0xFF]
+                for k in self.buffer()))
+        return self.__luminance
+
+    def contrast_matrix(self):
+        """
+        numpy (tones, tones) array of WCAG contrast ratios of all tone
+        pairs, tones in buffer() order. requires numpy
+
+        >>> palette = generate_palette(Color(hex='#FF0000'))
+        >>> print(palette.contrast_matrix()[0].round(2))
+        [1.   1.91 3.5  5.67 8.41]
+        """
+
+        import numpy as np
+        from .vectorized import contrast_matrix_batch
+        return contrast_matrix_batch(np.frombuffer(self.luminance()))
+
+    def contrast_black_white(self):
+        """
+        tuple of (contrast against black, against white) of every tone
+
+        >>> palette = generate_palette(Color(hex='#FF0000'))
+        >>> [(round(b, 2), round(w, 2)) for b, w in
+        ...  palette.contrast_black_white()][:2]
+        [(11.58, 1.81), (6.07, 3.46)]
+        """
+        return tuple(((k + 0.05) / 0.05, 1.05 / (k + 0.05))
+                     for k in self.luminance())
+
+    def contrast_pairs(self, threshold=4.5):
+        """
+        yield (tone index, tone index, contrast ratio) of every tone pair
+        reaching threshold, indexes in buffer() order with the darker
+        tone first. tones are sorted by luminance once, so only passing
+        pairs are visited
+
+        >>> palette = generate_palette(Color(hex='#FF0000'))
+        >>> [(i, j, round(ratio, 2))
+        ...  for i, j, ratio in palette.contrast_pairs(5)]
+        [(4, 0, 8.41), (3, 0, 5.67)]
+        """
+
+        from bisect import bisect_left
+        luminance = self.luminance()
+        order = sorted(range(len(luminance)), key=luminance.__getitem__)
+        ordered = [luminance[i] for i in order]
+        for position, dark in enumerate(order):
+            # lighter tones from this luminance up reach the threshold
+            least = (ordered[position] + 0.05) * threshold - 0.05
+            for light in order[bisect_left(ordered, least, position + 1):]:
+                yield dark, light, (luminance[light] + 0.05) / (
+                    luminance[dark] + 0.05)
+
+    def max_contrast(self):
+        """
+        highest WCAG contrast ratio between any two tones
+        """
+        luminance = self.luminance()
+        return (max(luminance) + 0.05) / (min(luminance) + 0.05)
+
+    def filter_contrast(self, threshold=4.5):
+        """
+        palette keeping the tones that reach threshold against black or
+        white, rows may end up empty
+
+        >>> palette = generate_palette(Color(hex='#FF0000'))
+        >>> next(palette.filter_contrast(7).hex_values())
+        ('#FFAAAA', '#801616', '#540000')
+        """
+
+        luminance = iter(self.luminance())
+        least = (threshold * 0.05 - 0.05, 1.05 / threshold - 0.05)
+        return Palette(
+            tuple(color for color in tones
+                  if not least[1] < next(luminance) < least[0])
+            for tones in self)
+
+    def snap(self, catalog):
+        """
+        palette of the nearest catalog.ColorCatalog color of every tone,
+        catalog.nearest_palette lists the k nearest ones
+        >>> from .catalog import ColorCatalog
+        >>> catalog = ColorCatalog(['#FFAAAA', '#A83939', '#540000'])
+        >>> palette = generate_palette(Color(hex='#FF0000'))
+        >>> palette.snap(catalog).print_hex_values()
+        #FFAAAA
+        #A83939
+        #A83939
+        #A83939
+        #540000
+        """
+        return Palette(
+            tuple(Color(hex=match.hex) for match, in row)
+            for row in catalog.nearest_palette(self))
+
+    def print_hex_values(self):
+        for tones in self:
             for color in tones:
                 color.print(print_mode='hex', round_ndigits=3)
 
     def print(self):
-        for tones in self.__palette:
+        for tones in self:
             for color in tones:
                 color.print(print_mode='hex_hsv', round_ndigits=3)
 
 
-def generate_palette(color, scheme='mono', preset='pastel'):
+def filter_presets(color, scheme='mono', threshold=4.5, presets=PRESETS_V3):
+    """
+    names of the presets whose palette of color has a tone pair reaching
+    the WCAG contrast threshold, only the lightest and darkest tones of
+    each palette are compared
+
+    >>> filter_presets(Color(hex='#FF0000'), threshold=5)
+    ['pastel']
+    """
+
+    return [preset for preset in presets
+            if generate_palette(color, scheme, preset).max_contrast() >=
+            threshold]
+
+
+def generate_palette(color, scheme='mono', preset='pastel', catalog=None):
     """
     Generates color scheme from given parameters
+    with a catalog.ColorCatalog tones are snapped to its nearest colors
     >>> cs = generate_palette(Color())
+    >>> cs.print_hex_values()
+    #FFAAAA
+    #D46A6A
+    #A83939
+    #801616
+    #540000
     >>> cs.print()
     #FFAAAA hue 0, saturation 0.333, value 1
     #D46A6A hue 0, saturation 0.5, value 0.83
-    #AA3939 hue 0, saturation 0.66, value 0.66
-    #801515 hue 0, saturation 0.83, value 0.5
-    #550000 hue 0, saturation 1, value 0.33
+    #A83939 hue 0, saturation 0.66, value 0.66
+    #801616 hue 0, saturation 0.83, value 0.5
+    #540000 hue 0, saturation 1, value 0.33
     """
 
     palette = (
         (tone for tone in generate_from_preset(base_color, preset))
         for base_color in generate_from_scheme(color, scheme)
     )
+    if catalog is not None:
+        return Palette(palette).snap(catalog)
     return Palette(palette)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+sRGB <-> linear rgb <-> CIE XYZ (D65) <-> CIELAB and OKLab
+
+rgb values are floats 0..1 like Color.rgb. matrices and their inverses
+are computed once at import, vectorized.py has the array versions
+"""
+
+from .constants import XYZ_tuple, LAB_tuple
+
+# IEC 61966-2-1 linear sRGB -> XYZ, D65
+SRGB_TO_XYZ = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+)
+
+# Ottosson's linear sRGB -> LMS and cube rooted LMS -> OKLab
+LINEAR_TO_LMS = (
+    (0.4122214708, 0.5363325363, 0.0514459929),
+    (0.2119034982, 0.6806995451, 0.1073969566),
+    (0.0883024619, 0.2817188376, 0.6299787005),
+)
+LMS_TO_OKLAB = (
+    (0.2104542553, 0.7936177850, -0.0040720468),
+    (1.9779984951, -2.4285922050, 0.4505937099),
+    (0.0259040371, 0.7827717662, -0.8086757660),
+)
+
+
+def invert3(m):
+    """
+    inverse of a 3x3 matrix given as rows
+    >>> invert3(((2, 0, 0), (0, 4, 0), (0, 0, 1)))
+    ((0.5, 0.0, 0.0), (0.0, 0.25, 0.0), (0.0, 0.0, 1.0))
+    """
+
+    (a, b, c), (d, e, f), (g, h, i) = m
+    cofactors = (
+        (e*i - f*h, c*h - b*i, b*f - c*e),
+        (f*g - d*i, a*i - c*g, c*d - a*f),
+        (d*h - e*g, b*g - a*h, a*e - b*d),
+    )
+    det = a*cofactors[0][0] + b*cofactors[1][0] + c*cofactors[2][0]
+    return tuple(tuple(k / det for k in row) for row in cofactors)
+
+
+def mul3(m, v):
+    return (m[0][0]*v[0] + m[0][1]*v[1] + m[0][2]*v[2],
+            m[1][0]*v[0] + m[1][1]*v[1] + m[1][2]*v[2],
+            m[2][0]*v[0] + m[2][1]*v[1] + m[2][2]*v[2])
+
+
+XYZ_TO_SRGB = invert3(SRGB_TO_XYZ)
+LMS_TO_LINEAR = invert3(LINEAR_TO_LMS)
+OKLAB_TO_LMS = invert3(LMS_TO_OKLAB)
+# XYZ of sRGB white, so that white is exactly L 100, a 0, b 0
+WHITE_D65 = tuple(sum(row) for row in SRGB_TO_XYZ)
+
+LAB_EPSILON = (6 / 29) ** 3
+LAB_KAPPA = 3 * (6 / 29) ** 2
+
+
+def srgb_to_linear(c):
+    """
+    >>> srgb_to_linear(0.5)
+    0.21404114048223255
+    """
+    if c <= 0.04045:
+        return c / 12.92
+    return ((c + 0.055) / 1.055) ** 2.4
+
+
+def linear_to_srgb(c):
+    """
+    >>> round(linear_to_srgb(0.21404114048223255), 12)
+    0.5
+    """
+    if c <= 0.0031308:
+        return c * 12.92
+    return 1.055 * c ** (1 / 2.4) - 0.055
+
+
+# linear value of every 8-bit sRGB channel value
+SRGB8_TO_LINEAR = tuple(srgb_to_linear(k / 255) for k in range(256))
+
+
+def rgb8_to_linear(rgb):
+    """
+    linear rgb of an 8-bit rgb triple, by table lookup
+    >>> rgb8_to_linear((255, 0, 128))
+    (1.0, 0.0, 0.21586050011389926)
+    """
+    r, g, b = rgb
+    return SRGB8_TO_LINEAR[r], SRGB8_TO_LINEAR[g], SRGB8_TO_LINEAR[b]
+
+
+# WCAG 2 relative luminance weights of linear r, g and b
+LUMINANCE_WEIGHTS = (0.2126, 0.7152, 0.0722)
+# weighted linear value of every 8-bit value of every channel, summing
+# the three channel entries gives the relative luminance
+LUMINANCE8 = tuple(tuple(w * k for k in SRGB8_TO_LINEAR)
+                   for w in LUMINANCE_WEIGHTS)
+
+
+def relative_luminance8(rgb):
+    """
+    WCAG relative luminance of an 8-bit rgb triple
+    >>> relative_luminance8((255, 255, 255)), relative_luminance8((0, 0, 0))
+    (1.0, 0.0)
+    """
+    red, green, blue = LUMINANCE8
+    return red[rgb[0]] + green[rgb[1]] + blue[rgb[2]]
+
+
+def contrast_ratio(luminance1, luminance2):
+    """
+    WCAG contrast ratio of two relative luminances, 1 to 21
+    >>> contrast_ratio(0., 1.)
+    21.0
+    """
+    if luminance1 < luminance2:
+        luminance1, luminance2 = luminance2, luminance1
+    return (luminance1 + 0.05) / (luminance2 + 0.05)
+
+
+def rgb_to_linear(rgb):
+    return tuple(srgb_to_linear(k) for k in rgb)
+
+
+def linear_to_rgb(linear):
+    return tuple(linear_to_srgb(k) for k in linear)
+
+
+def rgb_to_xyz(rgb):
+    """
+    >>> [round(k, 4) for k in rgb_to_xyz((1, 0, 0))]
+    [0.4125, 0.2127, 0.0193]
+    """
+    return XYZ_tuple(*mul3(SRGB_TO_XYZ, rgb_to_linear(rgb)))
+
+
+def xyz_to_rgb(xyz):
+    return linear_to_rgb(mul3(XYZ_TO_SRGB, xyz))
+
+
+def _lab_f(t):
+    if t > LAB_EPSILON:
+        return t ** (1 / 3)
+    return t / LAB_KAPPA + 4 / 29
+
+
+def _lab_f_inverse(t):
+    if t > 6 / 29:
+        return t ** 3
+    return LAB_KAPPA * (t - 4 / 29)
+
+
+def xyz_to_lab(xyz):
+    fx, fy, fz = (_lab_f(k / w) for k, w in zip(xyz, WHITE_D65))
+    return LAB_tuple(116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+def lab_to_xyz(lab):
+    lightness, a, b = lab
+    fy = (lightness + 16) / 116
+    return XYZ_tuple(*(w * _lab_f_inverse(f) for w, f in zip(
+        WHITE_D65, (fy + a / 500, fy, fy - b / 200))))
+
+
+def rgb8_to_lab(rgb):
+    """
+    CIELAB of an 8-bit rgb triple, linearized by table lookup
+    >>> [round(k, 2) for k in rgb8_to_lab((255, 0, 0))]
+    [53.24, 80.09, 67.2]
+    """
+    return xyz_to_lab(mul3(SRGB_TO_XYZ, rgb8_to_linear(rgb)))
+
+
+def rgb_to_lab(rgb):
+    """
+    CIELAB of an sRGB color
+    >>> [round(k, 2) for k in rgb_to_lab((1, 1, 1))]
+    [100.0, 0.0, 0.0]
+    >>> [round(k, 2) for k in rgb_to_lab((1, 0, 0))]
+    [53.24, 80.09, 67.2]
+    """
+    return xyz_to_lab(rgb_to_xyz(rgb))
+
+
+def lab_to_rgb(lab):
+    """
+    sRGB of a CIELAB color, out of gamut colors fall outside 0..1
+    >>> [round(k, 6) for k in lab_to_rgb(rgb_to_lab((0.2, 0.4, 0.6)))]
+    [0.2, 0.4, 0.6]
+    """
+    return xyz_to_rgb(lab_to_xyz(lab))
+
+
+def _cbrt(x):
+    return x ** (1 / 3) if x >= 0 else -(-x) ** (1 / 3)
+
+
+def rgb_to_oklab(rgb):
+    """
+    OKLab of an sRGB color
+    >>> [round(k, 4) for k in rgb_to_oklab((1, 0, 0))]
+    [0.628, 0.2249, 0.1258]
+    """
+    lms = mul3(LINEAR_TO_LMS, rgb_to_linear(rgb))
+    return LAB_tuple(*mul3(LMS_TO_OKLAB, tuple(_cbrt(k) for k in lms)))
+
+
+def oklab_to_rgb(lab):
+    """
+    >>> [round(k, 6) for k in oklab_to_rgb(rgb_to_oklab((0.2, 0.4, 0.6)))]
+    [0.2, 0.4, 0.6]
+    """
+    lms = tuple(k ** 3 for k in mul3(OKLAB_TO_LMS, lab))
+    return linear_to_rgb(mul3(LMS_TO_LINEAR, lms))
@@ -3,6 +3,9 @@ from collections import namedtuple
 HSV_tuple = namedtuple("HSV_tuple", ('hue', 'saturation', 'value'))
 RGB_tuple = namedtuple("RGB_tuple", ('red', 'green', 'blue'))
 RYB_tuple = namedtuple("RYB_tuple", ('red', 'yellow', 'blue'))
+XYZ_tuple = namedtuple("XYZ_tuple", ('x', 'y', 'z'))
+LAB_tuple = namedtuple("LAB_tuple", ('lightness', 'a', 'b'))
+Tone = namedtuple("Tone", ('rgb', 'hex'))
 
 # Different palettes - pastel, dark, default etc
 PRESETS = dict(
@@ -14,9 +17,18 @@ PRESETS_V3 = dict(
     pastel=((0.333, 1), (0.5, 0.83), (0.66, 0.66), (0.83, 0.5), (1, 0.33)),
 )
 
+# hue offsets on the paletton wheel for every color of the scheme,
+# free-style schemes are given as offsets directly
 SCHEMES = dict(
-    mono=(),
-    complimentary=(),
+    mono=(0,),
+    complementary=(0, 180),
+    adjacent=(0, -30, 30),
+    triad=(0, 150, 210),
+    tetrad=(0, 180, 30, 210),
+)
+SCHEMES.update(
+    complimentary=SCHEMES['complementary'],
+    analogic=SCHEMES['adjacent'],
 )
 
 COLOR_WHEEL = {
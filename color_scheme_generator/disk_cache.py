@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+persistent sqlite cache of generated palettes
+
+entries live in a namespace derived from the cache format version, the
+package version, the color wheel, preset and scheme tables and a digest
+of the tones generated from them, so palettes generated from other tables
+or by another tone arithmetic are never served
+"""
+
+import sqlite3
+from hashlib import sha256
+
+from . import __version__
+from .constants import COLOR_WHEEL_V3, PRESETS_V3, SCHEMES
+from .paletton import (
+    color_wheel_digest, freeze_color_wheel, get_paletton,
+)
+
+# bump when the key or value format changes
+CACHE_VERSION = 1
+
+
+def cache_namespace(color_wheel=COLOR_WHEEL_V3, presets=PRESETS_V3,
+                    schemes=SCHEMES):
+    """
+    >>> cache_namespace() == cache_namespace(dict(COLOR_WHEEL_V3))
+    True
+    >>> wheel = dict(COLOR_WHEEL_V3)
+    >>> wheel[0] = (254, 0, 0)
+    >>> cache_namespace() == cache_namespace(wheel)
+    False
+    """
+    tables = repr((CACHE_VERSION, __version__,
+                   color_wheel_digest(color_wheel),
+                   freeze_color_wheel(presets), freeze_color_wheel(schemes),
+                   tones_digest(color_wheel, presets)))
+    return sha256(tables.encode('ascii')).hexdigest()[:32]
+
+
+def tones_digest(color_wheel=COLOR_WHEEL_V3, presets=PRESETS_V3,
+                 samples=16):
+    """
+    sha256 hex digest of the paletton tone tables of every preset and of
+    the hsv engine palettes of samples fixed colors, changes whenever the
+    tone arithmetic changes its results
+    """
+
+    from .color_scheme_generator import Color, generate_palette
+    from .paletton import tone_table
+
+    digest = sha256()
+    for name in sorted(presets):
+        for tones in tone_table(color_wheel, presets[name]):
+            digest.update(''.join(tone.hex for tone in tones).encode('ascii'))
+    for k in range(samples):
+        color = Color(hex='#%06X' % (k * 0xFFFFFF // samples))
+        for name in sorted(set(presets) & set(PRESETS_V3)):
+            for tones in generate_palette(color, 'triad', name).hex_values():
+                digest.update(''.join(tones).encode('ascii'))
+    return digest.hexdigest()
+
+
+def palette_key(color, engine='paletton', scheme='mono', preset='pastel'):
+    """
+    cache key of a palette, color is a hex string for the hsv engine and
+    a paletton hue for the paletton engine
+    >>> palette_key('#ff0000', 'hsv', 'triad')
+    'hsv:triad:pastel:FF0000'
+    >>> palette_key(15)
+    'paletton:mono:pastel:15'
+    """
+    if isinstance(color, str):
+        color = color.lstrip('#').upper()
+        if len(color) == 3:
+            color = ''.join(k * 2 for k in color)
+    return '%s:%s:%s:%s' % (engine, scheme, preset, color)
+
+
+def palette_keys(data, engine='paletton', scheme='mono', preset='pastel',
+                 paletton=None):
+    """
+    cache keys of packed rgb colors, see parallel.pack_colors, paletton
+    hues are looked up on the wheel of paletton, the default one if None
+    >>> palette_keys(b'\\xff\\x00\\x00\\x00\\x00\\xff')
+    ['paletton:mono:pastel:0', 'paletton:mono:pastel:255']
+    >>> palette_keys(b'\\xff\\x00\\x00', 'hsv')
+    ['hsv:mono:pastel:FF0000']
+    """
+
+    colors = (data[i:i + 3] for i in range(0, len(data), 3))
+    if engine == 'paletton':
+        from .paletton import get_paletton, from_rgb_to_paletton_hue
+        paletton = paletton or get_paletton()
+        colors = (from_rgb_to_paletton_hue(tuple(rgb), paletton)
+                  for rgb in colors)
+    else:
+        colors = (rgb.hex() for rgb in colors)
+    return [palette_key(color, engine, scheme, preset) for color in colors]
+
+
+def encode_rows(rows):
+    """
+    >>> encode_rows((('#FF0000', '#00FF00'), ('#0000FF',)))
+    'FF0000,00FF00;0000FF'
+    """
+    return ';'.join(','.join(tone[1:] for tone in tones) for tones in rows)
+
+
+def decode_rows(value):
+    """
+    >>> decode_rows('FF0000,00FF00;0000FF')
+    (('#FF0000', '#00FF00'), ('#0000FF',))
+    """
+    return tuple(tuple('#' + tone for tone in tones.split(','))
+                 for tones in value.split(';'))
+
+
+class PaletteCache:
+    """
+    sqlite-backed mapping of palette keys to tone hex rows
+
+    writes are buffered and committed batch_size at a time, after each
+    commit entries beyond max_entries are evicted, entries of other
+    namespaces first and then the oldest ones. the number of entries is
+    counted once on opening and kept up to date by the writes, rows
+    written by other connections meanwhile are only seen on the next open
+
+    palettes of the paletton engine are generated by the paletton
+    attribute, a Paletton of color_wheel and presets
+
+    >>> with PaletteCache(':memory:', max_entries=2, batch_size=2) as cache:
+    ...     cache.put('a', (('#FF0000',),))
+    ...     cache.put_many([('b', (('#00FF00',),)), ('c', (('#0000FF',),))])
+    ...     len(cache), cache.get('a'), cache.get('c')
+    (2, None, (('#0000FF',),))
+    """
+
+    def __init__(self, path, max_entries=1000000, batch_size=1000,
+                 color_wheel=COLOR_WHEEL_V3, presets=PRESETS_V3,
+                 schemes=SCHEMES):
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.namespace = cache_namespace(color_wheel, presets, schemes)
+        self.color_wheel = color_wheel
+        self.presets = presets
+        self.paletton = get_paletton(color_wheel, presets)
+        self._pending = {}
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS palettes ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " UNIQUE (namespace, key))")
+        # rows of all namespaces, evict() compares it to max_entries
+        self._rows = self._db.execute(
+            "SELECT COUNT(*) FROM palettes").fetchone()[0]
+
+    def __len__(self):
+        self.flush()
+        return self._db.execute(
+            "SELECT COUNT(*) FROM palettes WHERE namespace = ?",
+            (self.namespace,)).fetchone()[0]
+
+    def get(self, key):
+        return self.get_many((key,)).get(key)
+
+    def get_many(self, keys):
+        """
+        dict of the cached keys to their rows, missing keys are left out
+        """
+
+        found = {}
+        query = []
+        for key in keys:
+            if key in self._pending:
+                found[key] = self._pending[key]
+            else:
+                query.append(key)
+        # stay below the sqlite limit of bound parameters
+        for start in range(0, len(query), 500):
+            batch = query[start:start + 500]
+            rows = self._db.execute(
+                "SELECT key, value FROM palettes WHERE namespace = ? "
+                "AND key IN (%s)" % ','.join('?' * len(batch)),
+                [self.namespace] + batch)
+            found.update((key, decode_rows(value)) for key, value in rows)
+        return found
+
+    def put(self, key, rows):
+        self._pending[key] = rows
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def put_many(self, items):
+        for key, rows in items:
+            self.put(key, rows)
+
+    def flush(self):
+        if not self._pending:
+            return
+        # replaced keys do not add rows
+        replaced = len(self._stored_keys(self._pending))
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO palettes VALUES (?, ?, ?)",
+                ((self.namespace, key, encode_rows(rows))
+                 for key, rows in self._pending.items()))
+        self._rows += len(self._pending) - replaced
+        self._pending.clear()
+        self.evict()
+
+    def _stored_keys(self, keys):
+        """
+        the keys stored in the database, pending writes aside
+        """
+
+        keys = list(keys)
+        stored = set()
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            stored.update(key for key, in self._db.execute(
+                "SELECT key FROM palettes WHERE namespace = ? "
+                "AND key IN (%s)" % ','.join('?' * len(batch)),
+                [self.namespace] + batch))
+        return stored
+
+    def evict(self):
+        if self._rows <= self.max_entries:
+            return
+        with self._db:
+            deleted = self._db.execute(
+                "DELETE FROM palettes WHERE rowid IN ("
+                "SELECT rowid FROM palettes ORDER BY namespace = ?, rowid "
+                "LIMIT ?)", (self.namespace, self._rows - self.max_entries))
+        self._rows -= deleted.rowcount
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def warm_cache(cache, presets=PRESETS_V3, schemes=SCHEMES, paletton=None):
+    """
+    store paletton engine palettes for all 360 hues, presets and schemes,
+    return the number of entries written. palettes come from the paletton
+    of the cache unless paletton is given
+
+    >>> with PaletteCache(':memory:') as cache:
+    ...     warm_cache(cache, presets=('pastel',), schemes=('mono',))
+    ...     cache.get(palette_key(0))[0][0]
+    360
+    '#FFAAAA'
+    """
+
+    paletton = paletton or cache.paletton
+    count = 0
+    for preset in presets:
+        for scheme in schemes:
+            for hue in range(360):
+                rows = tuple(
+                    tuple(tone.hex for tone in tones)
+                    for tones in paletton.scheme(hue, scheme, preset))
+                cache.put(palette_key(hue, 'paletton', scheme, preset), rows)
+                count += 1
+    cache.flush()
+    return count
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+integer version of the 8-bit tone arithmetic of paletton.variations_generator
+
+preset ratios are integers in units of 1 / SCALE, the base saturation and
+value of a color are exact fractions and every tone channel is an exact
+fraction rounded half up with divmod. the float formula rounds ties by its
+own rounding error instead, so a tone with a channel within
+2 ** -GUARD_BITS of a tie is left out by fixed_tones and callers compute it
+with the float formula, which keeps results identical to it
+"""
+
+from functools import lru_cache
+
+SCALE = 10000
+GUARD_BITS = 30
+
+
+@lru_cache(maxsize=64)
+def fixed_preset(preset):
+    """
+    preset (a tuple of (saturation, value) ratio pairs) as integer pairs
+    in units of 1 / SCALE, None if a ratio is not a multiple of 1 / SCALE
+
+    >>> fixed_preset(((0.61, 1), (1, -0.7)))
+    ((6100, 10000), (10000, -7000))
+    >>> fixed_preset(((1 / 3, 1),)) is None
+    True
+    """
+
+    fixed = tuple(tuple(round(k * SCALE) for k in pair) for pair in preset)
+    for pair, ratios in zip(fixed, preset):
+        if any(k / SCALE != ratio for k, ratio in zip(pair, ratios)):
+            return None
+    return fixed
+
+
+def rgb_base(rgb):
+    """
+    exact hsv (saturation numerator, denominator, value numerator,
+    denominator) of an 8-bit rgb color
+    >>> rgb_base((255, 51, 0))
+    (255, 255, 255, 255)
+    """
+    high, low = max(rgb), min(rgb)
+    return high - low, high or 1, high, 255
+
+
+def fixed_tones(rgb, base, preset):
+    """
+    tuple of tone rgb tuples of an 8-bit rgb color whose exact base
+    saturation and value are base, see rgb_base, for a fixed_preset.
+    tones with a channel too close to a rounding tie are None
+
+    >>> fixed_tones((255, 0, 0), rgb_base((255, 0, 0)),
+    ...             fixed_preset(((0.61, 1), (1, 0.7725), (1, 0.5))))
+    ((255, 99, 99), (197, 0, 0), None)
+    """
+
+    r, g, b = rgb
+    high = max(r, g, b)
+    sn0, sd0, vn0, vd0 = base
+    tones = []
+    for sn, vn in preset:
+        # sv_variations: a negative ratio scales the base, and both are
+        # clamped to [0, 1]
+        if sn < 0:
+            sn, sd = -sn * sn0, SCALE * sd0
+        else:
+            sd = SCALE
+        if sn >= sd:
+            sn = sd = 1
+        if vn < 0:
+            vn, vd = -vn * vn0, SCALE * vd0
+        else:
+            vd = SCALE
+        if vn >= vd:
+            vn = vd = 1
+        # tone = v * 255 * (high - s * (high - channel)) / high, rounded
+        # half up as (2 * tone + 1) // 2. a remainder within near of 0 or
+        # of the divisor is within 2 ** -GUARD_BITS of a tie
+        if high:
+            divisor = 2 * vd * sd * high
+            full = 510 * vn * sd * high + divisor // 2
+            step = 510 * vn * sn
+        else:
+            divisor = 2 * vd * sd
+            full = 510 * vn * (sd - sn) + divisor // 2
+            step = 0
+        near = divisor >> GUARD_BITS
+        last = divisor - near
+        red, rem = divmod(full - step * (high - r), divisor)
+        if near < rem < last:
+            green, rem = divmod(full - step * (high - g), divisor)
+            if near < rem < last:
+                blue, rem = divmod(full - step * (high - b), divisor)
+                if near < rem < last:
+                    tones.append((255 if red > 255 else red,
+                                  255 if green > 255 else green,
+                                  255 if blue > 255 else blue))
+                    continue
+        tones.append(None)
+    return tuple(tones)
+
+
+def interpolate(start, stop, rate):
+    """
+    list of the rate integer channel values from start towards stop,
+    like round(k) for k in paletton.linspace(start, stop, rate,
+    endpoint=False). rate must be odd, so that no value is a rounding tie
+
+    >>> interpolate(0, 51, 15)
+    [0, 3, 7, 10, 14, 17, 20, 24, 27, 31, 34, 37, 41, 44, 48]
+    """
+
+    if not rate % 2:
+        raise ValueError("rate must be odd")
+    return [(2 * (start * rate + (stop - start) * k) + rate) // (2 * rate)
+            for k in range(rate)]
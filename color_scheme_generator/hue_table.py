@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+precomputed rgb -> paletton hue table for every 8-bit rgb triple
+
+the table is a flat file: 64 bytes header followed by 2**24 little-endian
+uint16 paletton hues indexed by (red << 16) | (green << 8) | blue.
+it is opened with mmap so that all processes share the same pages
+building requires numpy
+"""
+
+import mmap
+import os
+import sys
+
+from .paletton import Paletton, color_wheel_digest, from_rgb_to_paletton_hue
+
+MAGIC = b'CSGHUE01'
+HEADER_SIZE = 64
+TABLE_SIZE = 1 << 24
+
+
+def make_header(color_wheel):
+    digest = bytes.fromhex(color_wheel_digest(color_wheel))
+    return (MAGIC + digest).ljust(HEADER_SIZE, b'\0')
+
+
+def build_hue_table(path, color_wheel=Paletton.COLOR_WHEEL,
+                    chunk_size=1 << 20):
+    """
+    compute paletton hues of all 2**24 rgb triples and write them to path
+    the file is written next to path and renamed when complete
+    """
+
+    import numpy as np
+    from .vectorized import from_rgb_to_paletton_hue_batch
+
+    hue_index = Paletton(COLOR_WHEEL=color_wheel).HUE_INDEX
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(make_header(color_wheel))
+        for start in range(0, TABLE_SIZE, chunk_size):
+            index = np.arange(start, start + chunk_size, dtype=np.uint32)
+            rgb = np.stack((index >> 16, (index >> 8) & 0xFF, index & 0xFF),
+                           axis=-1)
+            hues = from_rgb_to_paletton_hue_batch(rgb, hue_index)
+            f.write(hues.astype('<u2').tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+class HueTable:
+    """
+    read-only memory-mapped rgb -> paletton hue table
+
+    pass color_wheel to check that the table was built from it
+    """
+
+    def __init__(self, path, color_wheel=None):
+        if sys.byteorder != 'little':
+            raise ValueError("hue table requires a little-endian host")
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._mmap[:HEADER_SIZE]
+        if (not header.startswith(MAGIC) or
+                len(self._mmap) != HEADER_SIZE + 2 * TABLE_SIZE):
+            self._mmap.close()
+            raise ValueError("%s is not a hue table" % path)
+        if color_wheel is not None and header != make_header(color_wheel):
+            self._mmap.close()
+            raise ValueError("%s was built from another color wheel" % path)
+        self._table = memoryview(self._mmap)[HEADER_SIZE:].cast('H')
+
+    def __getitem__(self, rgb):
+        r, g, b = rgb
+        return self._table[(r << 16) | (g << 8) | b]
+
+    def __len__(self):
+        return TABLE_SIZE
+
+    def lookup_batch(self, rgb):
+        """
+        take (N, 3) uint8 array, return (N,) uint16 array of paletton hues
+        """
+
+        import numpy as np
+        rgb = np.asarray(rgb, dtype=np.uint32).reshape(-1, 3)
+        table = np.frombuffer(self._table, dtype='<u2')
+        return table[(rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]]
+
+    def close(self):
+        self._table.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def validate_hue_table(table, paletton, samples=10000, seed=0):
+    """
+    compare table against from_rgb_to_paletton_hue on random rgb triples
+    return list of (rgb, table hue, expected hue) mismatches
+    """
+
+    from random import Random
+    rnd = Random(seed)
+    mismatches = []
+    for _ in range(samples):
+        rgb = tuple(rnd.randrange(256) for _ in range(3))
+        expected = from_rgb_to_paletton_hue(rgb, paletton)
+        if table[rgb] != expected:
+            mismatches.append((rgb, table[rgb], expected))
+    return mismatches
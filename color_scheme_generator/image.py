@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+dominant paletton hues of an image and palettes made from them
+
+images are binary PPM (P6) or PAM (P7, RGB or RGB_ALPHA) files with
+8-bit channels, or raw buffers of rgb / rgba pixels. files are memory
+mapped and read in chunks of whole pixels into a histogram of
+bits * 3 bit colors, so memory use does not depend on the image size.
+the histogram is counted with numpy when it is installed
+"""
+
+import mmap
+import os
+from collections import Counter
+
+CHUNK_PIXELS = 1 << 20
+
+
+def read_image_header(data):
+    """
+    parse a PPM or PAM header, return (width, height, depth, offset)
+    where offset is the position of the first pixel byte
+
+    >>> read_image_header(b'P6\\n# comment\\n2 1\\n255\\n' + bytes(6))
+    (2, 1, 3, 21)
+    >>> read_image_header(b'P7\\nWIDTH 1\\nHEIGHT 1\\nDEPTH 4\\nMAXVAL 255\\n'
+    ...                   b'TUPLTYPE RGB_ALPHA\\nENDHDR\\n' + bytes(4))
+    (1, 1, 4, 65)
+    """
+
+    magic = bytes(data[:2])
+    if magic == b'P6':
+        fields = []
+        offset = 2
+        while len(fields) < 3:
+            while data[offset:offset + 1].isspace():
+                offset += 1
+            if data[offset:offset + 1] == b'#':
+                offset = data.find(b'\n', offset)
+                if offset < 0:
+                    raise ValueError("truncated PPM header")
+                continue
+            start = offset
+            while data[offset:offset + 1].isdigit():
+                offset += 1
+            if start == offset:
+                raise ValueError("bad PPM header")
+            fields.append(int(data[start:offset]))
+        width, height, maxval = fields
+        depth = 3
+        # a single whitespace byte separates the header from the pixels
+        offset += 1
+    elif magic == b'P7':
+        end = data.find(b'ENDHDR\n')
+        if end < 0:
+            raise ValueError("truncated PAM header")
+        header = dict(
+            line.split(None, 1) for line in bytes(data[3:end]).decode(
+                'ascii').splitlines()
+            if line.strip() and not line.startswith('#'))
+        width, height, depth, maxval = (int(header.get(name, 0)) for name in (
+            'WIDTH', 'HEIGHT', 'DEPTH', 'MAXVAL'))
+        if depth not in (3, 4):
+            raise ValueError("PAM images must be RGB or RGB_ALPHA")
+        offset = end + len(b'ENDHDR\n')
+    else:
+        raise ValueError("not a binary PPM or PAM image")
+    if maxval != 255:
+        raise ValueError("only 8-bit images are supported")
+    if len(data) < offset + width * height * depth:
+        raise ValueError("image data is truncated")
+    return width, height, depth, offset
+
+
+def iter_pixel_chunks(data, depth=3, chunk_pixels=CHUNK_PIXELS):
+    """
+    yield memoryviews of at most chunk_pixels whole pixels of data
+    """
+
+    data = memoryview(data).cast('B')
+    step = chunk_pixels * depth
+    for start in range(0, len(data) - len(data) % depth, step):
+        yield data[start:min(start + step, len(data) - len(data) % depth)]
+
+
+def _histogram_python(chunks, depth, bits):
+    shift = 8 - bits
+    # drop the low bits of every byte in one C level pass
+    table = bytes((k >> shift) for k in range(256))
+    counts = Counter()
+    for chunk in chunks:
+        quantized = bytes(chunk).translate(table)
+        counts.update(zip(quantized[0::depth], quantized[1::depth],
+                          quantized[2::depth]))
+    return {(r << 2 * bits) | (g << bits) | b: count
+            for (r, g, b), count in counts.items()}
+
+
+def _histogram_numpy(chunks, depth, bits):
+    import numpy as np
+    shift = 8 - bits
+    histogram = np.zeros(1 << 3 * bits, dtype=np.int64)
+    for chunk in chunks:
+        pixels = np.frombuffer(chunk, dtype=np.uint8).reshape(-1, depth)
+        rgb = (pixels[:, :3] >> shift).astype(np.intp)
+        histogram += np.bincount(
+            (rgb[:, 0] << 2 * bits) | (rgb[:, 1] << bits) | rgb[:, 2],
+            minlength=len(histogram))
+    return {int(k): int(histogram[k]) for k in np.flatnonzero(histogram)}
+
+
+def color_histogram(chunks, depth=3, bits=5):
+    """
+    dict of quantized color -> pixel count over chunks of pixel bytes,
+    the color is r, g and b cut to bits bits and packed as r g b
+
+    >>> pixels = bytes((255, 0, 0, 248, 7, 0, 0, 0, 255))
+    >>> sorted(color_histogram([pixels]).items())
+    [(31, 1), (31744, 2)]
+    """
+
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return _histogram_python(chunks, depth, bits)
+    return _histogram_numpy(chunks, depth, bits)
+
+
+def hue_weights(histogram, bits=5, min_chroma=32, paletton=None):
+    """
+    list of 360 pixel counts per paletton hue, from the center color of
+    every histogram cell. cells whose max - min channel difference is
+    below min_chroma have no meaningful hue and are skipped
+    """
+
+    from .paletton import get_paletton, from_rgb_to_paletton_hue
+    paletton = paletton or get_paletton()
+    mask = (1 << bits) - 1
+    shift = 8 - bits
+    half = (1 << shift) >> 1
+    weights = [0] * 360
+    for color, count in histogram.items():
+        rgb = tuple(((color >> k) & mask) << shift | half
+                    for k in (2 * bits, bits, 0))
+        if max(rgb) - min(rgb) < min_chroma:
+            continue
+        weights[from_rgb_to_paletton_hue(rgb, paletton)] += count
+    return weights
+
+
+def pick_hues(weights, count=3, radius=7):
+    """
+    list of up to count (hue, share) of the heaviest hues, share is the
+    fraction of the total weight within radius of the hue. hues closer
+    than 2 * radius to an already picked hue are not picked
+
+    >>> weights = [0] * 360
+    >>> weights[0], weights[358], weights[120], weights[125] = 5, 2, 2, 1
+    >>> pick_hues(weights, count=5)
+    [(0, 0.7), (120, 0.3)]
+    """
+
+    total = sum(weights)
+    if not total:
+        return []
+    window = [sum(weights[(hue + d) % 360] for d in range(-radius, radius + 1))
+              for hue in range(360)]
+    picked = []
+    while len(picked) < count:
+        hue = max(range(360), key=lambda k: (window[k], weights[k]))
+        if not window[hue]:
+            break
+        picked.append((hue, window[hue] / total))
+        for d in range(-2 * radius, 2 * radius + 1):
+            window[(hue + d) % 360] = 0
+    return picked
+
+
+def dominant_hues(source, count=3, depth=3, bits=5, min_chroma=32,
+                  radius=7, chunk_pixels=CHUNK_PIXELS):
+    """
+    list of up to count (paletton hue, share) of the image, heaviest first
+
+    source is a path of a PPM or PAM file, or a buffer of raw pixels of
+    depth bytes (3 for rgb, 4 for rgba)
+    """
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            width, height, depth, offset = read_image_header(data)
+            with memoryview(data) as view:
+                pixels = view[offset:offset + width * height * depth]
+                histogram = color_histogram(
+                    iter_pixel_chunks(pixels, depth, chunk_pixels),
+                    depth, bits)
+                pixels.release()
+    else:
+        histogram = color_histogram(
+            iter_pixel_chunks(source, depth, chunk_pixels), depth, bits)
+    return pick_hues(hue_weights(histogram, bits, min_chroma), count, radius)
+
+
+def image_palette(source, scheme='mono', preset='pastel', count=1, **kwargs):
+    """
+    Palette of the dominant hues of an image
+
+    the scheme is built on the most dominant hue, with scheme=None every
+    one of the count dominant hues gets its own row instead.
+    other keyword arguments go to dominant_hues
+
+    >>> pixels = bytes((200, 30, 30)) * 6 + bytes((30, 30, 200)) * 4
+    >>> list(image_palette(pixels, scheme=None, count=2).hex_values())
+    ... # doctest: +NORMALIZE_WHITESPACE
+    [('#FFAAAA', '#D46A6A', '#A83939', '#801616', '#540000'),
+     ('#B7B7FF', '#7A7AD4', '#4A4AA8', '#262680', '#0D0D54')]
+    """
+
+    from .color_scheme_generator import Color, Palette
+    from .paletton import get_paletton
+
+    paletton = get_paletton()
+    hues = [hue for hue, _ in dominant_hues(source, count, **kwargs)]
+    if scheme is None:
+        rows = [paletton.tones(hue, preset) for hue in hues]
+    else:
+        rows = paletton.scheme(hues[0], scheme, preset) if hues else ()
+    return Palette(tuple(Color(hex=tone.hex) for tone in tones)
+                   for tones in rows)
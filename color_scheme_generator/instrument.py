@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+opt-in call counters and timings of the palette generation stages
+
+enable() swaps timed wrappers into the module globals and class
+attributes the package calls through, disable() puts the originals back,
+so nothing is measured and nothing is slowed down while it is off
+
+    with instrumented() as stats:
+        generate_palette(Color(hex='#FF0000'), 'triad')
+    print(stats.to_json())
+
+stages nest, the time of a stage includes the stages it calls. generator
+stages count the time spent producing their items, not the time their
+consumer spends between items. functions bound with ``from ... import``
+outside the package before enable() keep calling the originals, the
+package itself calls them through their modules
+"""
+
+import importlib
+from threading import Lock
+from time import perf_counter_ns
+
+# stage name, module, attribute path of the function or property
+STAGES = (
+    ('generate_from_scheme', 'color_scheme_generator',
+     'generate_from_scheme'),
+    ('generate_from_preset', 'color_scheme_generator',
+     'generate_from_preset'),
+    ('Color.__init__', 'color_scheme_generator', 'Color.__init__'),
+    ('Color.rgb', 'color_scheme_generator', 'Color.rgb'),
+    ('Color.hex', 'color_scheme_generator', 'Color.hex'),
+    ('Palette.hex_values', 'color_scheme_generator', 'Palette.hex_values'),
+    # every wheel expansion, ColorWheel and expand_color_wheel included
+    ('expand_color_wheel', 'paletton', 'interpolate_wheel'),
+    ('hue_lookup', 'paletton', 'lookup_paletton_hue'),
+)
+
+# stage -> [calls, nanoseconds], updates from several threads may be lost
+_COUNTERS = {stage: [0, 0] for stage, _, _ in STAGES}
+# (owner, attribute, original) of every swapped stage while enabled
+_ORIGINALS = []
+_DEPTH = 0
+_LOCK = Lock()
+
+
+def _timed(func, counter):
+    from functools import wraps
+
+    @wraps(func)
+    def timed(*args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            counter[1] += perf_counter_ns() - start
+            counter[0] += 1
+
+    return timed
+
+
+def _timed_generator(func, counter):
+    from functools import wraps
+
+    @wraps(func)
+    def timed(*args, **kwargs):
+        counter[0] += 1
+        start = perf_counter_ns()
+        items = func(*args, **kwargs)
+        while True:
+            try:
+                item = next(items)
+            except StopIteration:
+                counter[1] += perf_counter_ns() - start
+                return
+            counter[1] += perf_counter_ns() - start
+            yield item
+            start = perf_counter_ns()
+
+    return timed
+
+
+def _wrap(value, counter):
+    from inspect import isgeneratorfunction
+    if isinstance(value, property):
+        return property(_timed(value.fget, counter), value.fset,
+                        value.fdel, value.__doc__)
+    if isgeneratorfunction(value):
+        return _timed_generator(value, counter)
+    return _timed(value, counter)
+
+
+def enable():
+    """
+    start counting, calls nest: every enable() needs its disable()
+    """
+
+    global _DEPTH
+    with _LOCK:
+        _DEPTH += 1
+        if _DEPTH > 1:
+            return
+        for stage, module, path in STAGES:
+            owner = importlib.import_module(
+                '.' + module, __package__)
+            *parents, attribute = path.split('.')
+            for parent in parents:
+                owner = getattr(owner, parent)
+            # class attributes are read from __dict__, not through the
+            # descriptor, so that properties are wrapped as properties
+            original = vars(owner)[attribute]
+            _ORIGINALS.append((owner, attribute, original))
+            setattr(owner, attribute, _wrap(original, _COUNTERS[stage]))
+
+
+def disable():
+    """
+    stop counting once every enable() is matched, counters are kept
+    """
+
+    global _DEPTH
+    with _LOCK:
+        if not _DEPTH:
+            return
+        _DEPTH -= 1
+        if _DEPTH:
+            return
+        while _ORIGINALS:
+            owner, attribute, original = _ORIGINALS.pop()
+            setattr(owner, attribute, original)
+
+
+def is_enabled():
+    return _DEPTH > 0
+
+
+def reset():
+    """
+    zero all counters
+    """
+    for counter in _COUNTERS.values():
+        counter[:] = 0, 0
+
+
+def snapshot():
+    """
+    dict of stage -> calls, total_ns and mean_ns
+
+    >>> reset()
+    >>> snapshot()['generate_from_preset']
+    {'calls': 0, 'total_ns': 0, 'mean_ns': 0}
+    """
+
+    return {
+        stage: dict(calls=calls, total_ns=ns,
+                    mean_ns=ns // calls if calls else 0)
+        for stage, (calls, ns) in _COUNTERS.items()
+    }
+
+
+def snapshot_json(**kwargs):
+    """
+    snapshot() as a JSON string, keyword arguments go to json.dumps
+    """
+    import json
+    return json.dumps(snapshot(), **kwargs)
+
+
+class Instrumented:
+    """
+    context manager enabling the counters within a block, see instrumented
+    """
+
+    def __init__(self, reset=True):
+        self._reset = reset
+        self.stats = None
+
+    def __enter__(self):
+        if self._reset:
+            reset()
+        enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        disable()
+        self.stats = snapshot()
+        return False
+
+    def snapshot(self):
+        """
+        counters as of now inside the block, as of its end after it
+        """
+        return snapshot() if self.stats is None else self.stats
+
+    def to_json(self, **kwargs):
+        import json
+        return json.dumps(self.snapshot(), **kwargs)
+
+
+def instrumented(reset=True):
+    """
+    count and time the stages within a with block, counters are zeroed
+    on entry unless reset is False
+
+    >>> from .color_scheme_generator import Color, generate_palette
+    >>> with instrumented() as stats:
+    ...     _ = list(generate_palette(Color(), 'triad').hex_values())
+    >>> counts = {k: v['calls'] for k, v in stats.snapshot().items()}
+    >>> counts['generate_from_scheme'], counts['generate_from_preset']
+    (1, 3)
+    >>> counts['Color.__init__'], counts['Palette.hex_values']
+    (18, 1)
+    >>> is_enabled()
+    False
+    """
+    return Instrumented(reset)
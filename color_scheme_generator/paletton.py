@@ -1,18 +1,43 @@
-from constants import (COLOR_WHEEL_V3, PRESETS_V3)
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from collections.abc import Mapping
+from types import MappingProxyType
+from .constants import (COLOR_WHEEL_V3, PRESETS_V3, SCHEMES, Tone)
+from .utils import LRUCache, _SWEEP_CACHE
+from . import fixed_point
 
-import logging as log
-log.basicConfig(level=log.DEBUG)
+# bound of the process-wide wheel and tone table caches
+WHEEL_CACHE_SIZE = 32
+
+# compute tone tables and make_tones with the integer arithmetic of
+# fixed_point, tones are the same either way
+FIXED_POINT = True
+
+# rgb holds r, g, b bytes hue by hue, saturation and value are read-only
+# float arrays of the base (s, v) of every hue the presets scale.
+# exact_base holds them as fixed_point fractions
+WheelTables = namedtuple(
+    "WheelTables",
+    ('expanded_color_wheel', 'hue_offsets', 'hue_index', 'wheel_hues',
+     'rgb', 'saturation', 'value', 'exact_base'))
 
 
 class Paletton:
     """
     compose color schemes similar to paletton.com
+
+    COLOR_WHEEL maps every 15th paletton hue to an (r, g, b) anchor like
+    COLOR_WHEEL_V3, or to an (r, g, b, value percent) anchor like
+    constants.COLOR_WHEEL, see normalize_color_wheel
     """
 
     COLOR_WHEEL = COLOR_WHEEL_V3
     PRESETS = PRESETS_V3
     DEFAULT_PRESET = PRESETS_V3['full_colors']
     HUE_OFFSETS = None
+    HUE_INDEX = None
+    WHEEL_HUES = None
     EXPANDED_COLOR_WHEEL = None
 
     def __init__(self, **kwargs):
@@ -20,8 +45,289 @@ class Paletton:
             self.COLOR_WHEEL = kwargs['COLOR_WHEEL']
         if 'PRESETS' in kwargs:
             self.PRESETS = kwargs['PRESETS']
-        self.EXPANDED_COLOR_WHEEL = expand_color_wheel(self.COLOR_WHEEL)
-        self.HUE_OFFSETS = calculate_hue_offsets(self.EXPANDED_COLOR_WHEEL)
+        # preset argument -> shared tone table, saves freezing the wheel
+        self._tone_tables = {}
+        if isinstance(self.COLOR_WHEEL, ColorWheel):
+            # share the tables the wheel keeps up to date
+            wheel = self.COLOR_WHEEL
+            self.EXPANDED_COLOR_WHEEL = wheel.expanded
+            self.HUE_OFFSETS = wheel.hue_offsets
+            self.HUE_INDEX = wheel.hue_index
+            self.WHEEL_HUES = wheel.wheel_hues
+            return
+        tables = wheel_tables(self.COLOR_WHEEL)
+        self.EXPANDED_COLOR_WHEEL = tables.expanded_color_wheel
+        self.HUE_OFFSETS = tables.hue_offsets
+        self.HUE_INDEX = tables.hue_index
+        self.WHEEL_HUES = tables.wheel_hues
+
+    def get_preset(self, preset=None):
+        if preset is None:
+            return self.DEFAULT_PRESET
+        if isinstance(preset, str):
+            return self.PRESETS[preset]
+        return preset
+
+    def variations_batch(self, rgb, preset=None):
+        """
+        numpy batch version of variations_generator
+        take (N, 3) uint8 array of base colors, return (N, len(preset), 3)
+        preset is a name from self.PRESETS or a tuple of (s, v) pairs
+        """
+
+        from .vectorized import variations_batch
+        return variations_batch(rgb, self.get_preset(preset))
+
+    def tone_table(self, preset=None):
+        """
+        360 rows of precomputed tones for the preset, see tone_table()
+        """
+
+        if isinstance(self.COLOR_WHEEL, ColorWheel):
+            return self.COLOR_WHEEL.tone_rows(self.get_preset(preset))
+        try:
+            return self._tone_tables[preset]
+        except KeyError:
+            table = tone_table(self.COLOR_WHEEL, self.get_preset(preset))
+            self._tone_tables[preset] = table
+            return table
+        except TypeError:
+            # unhashable preset
+            return tone_table(self.COLOR_WHEEL, self.get_preset(preset))
+
+    def tones(self, hue, preset=None):
+        """
+        row of Tone(rgb, hex) for the paletton hue, taken from the table
+        >>> p = Paletton()
+        >>> print(*(tone.hex for tone in p.tones(0)))
+        #FF6363 #FF3939 #FF0000 #C50000 #9B0000
+        >>> p.tones(360) is Paletton().tones(0)
+        True
+        """
+
+        return self.tone_table(preset)[round(hue) % 360]
+
+    def scheme_hues(self, hue, scheme='mono'):
+        """
+        paletton hues of the scheme colors for the base paletton hue
+        scheme is a name from SCHEMES or a tuple of hue offsets (free-style)
+        >>> Paletton().scheme_hues(350, 'triad')
+        (350, 140, 200)
+        """
+
+        hue = round(hue)
+        return tuple((hue + offset) % 360 for offset in get_scheme(scheme))
+
+    def scheme(self, hue, scheme='mono', preset=None):
+        """
+        tone rows for every color of the scheme, read from the tone table
+        >>> for tones in Paletton().scheme(0, 'complementary'):
+        ...     print(*(tone.hex for tone in tones))
+        #FF6363 #FF3939 #FF0000 #C50000 #9B0000
+        #63FF63 #39FF39 #00FF00 #00C500 #009B00
+        """
+
+        table = self.tone_table(preset)
+        return tuple(table[k] for k in self.scheme_hues(hue, scheme))
+
+    def rgb_to_hue_batch(self, rgb):
+        """
+        numpy batch version of from_rgb_to_paletton_hue
+        take (N, 3) array of rgb colors, return (N,) array of paletton hues
+        """
+
+        from .vectorized import from_rgb_to_paletton_hue_batch
+        return from_rgb_to_paletton_hue_batch(rgb, self.HUE_INDEX)
+
+
+_DEFAULT_PALETTON = None
+
+
+def get_paletton(color_wheel=None, presets=None):
+    """
+    Paletton of color_wheel and presets, the one with the default wheel
+    and presets is created once per process
+    >>> get_paletton() is get_paletton(COLOR_WHEEL_V3, PRESETS_V3)
+    True
+    >>> get_paletton(dict(COLOR_WHEEL_V3)) is get_paletton()
+    False
+    """
+
+    kwargs = {}
+    if color_wheel is not None and color_wheel is not Paletton.COLOR_WHEEL:
+        kwargs['COLOR_WHEEL'] = color_wheel
+    if presets is not None and presets is not Paletton.PRESETS:
+        kwargs['PRESETS'] = presets
+    if kwargs:
+        return Paletton(**kwargs)
+    global _DEFAULT_PALETTON
+    if _DEFAULT_PALETTON is None:
+        _DEFAULT_PALETTON = Paletton()
+    return _DEFAULT_PALETTON
+
+
+_WHEEL_CACHE = LRUCache(WHEEL_CACHE_SIZE)
+_TONE_CACHE = LRUCache(WHEEL_CACHE_SIZE)
+
+
+def set_wheel_cache_size(maxsize=WHEEL_CACHE_SIZE):
+    """
+    bound the wheel, tone table and sweep table caches, None is unbounded
+    """
+    _WHEEL_CACHE.resize(maxsize)
+    _TONE_CACHE.resize(maxsize)
+    _SWEEP_CACHE.resize(maxsize)
+
+
+def wheel_cache_info():
+    """
+    hits, misses, size and hit rate of the wheel, tone table and
+    utils.sweep_table caches
+    """
+    return dict(wheel_tables=_WHEEL_CACHE.info(),
+                tone_tables=_TONE_CACHE.info(),
+                sweep_tables=_SWEEP_CACHE.info())
+
+
+def wheel_tables(color_wheel):
+    """
+    read-only WheelTables derived from the color wheel, computed once per
+    wheel contents and shared by every Paletton using an equal wheel
+
+    >>> wheel_tables(dict(COLOR_WHEEL_V3)) is wheel_tables(COLOR_WHEEL_V3)
+    True
+    >>> wheel_tables(COLOR_WHEEL_V3).expanded_color_wheel[257]
+    (31, 26, 178)
+    """
+
+    def build():
+        rgb, saturation, value = normalize_color_wheel(color_wheel)
+        expanded = dict(enumerate(rgb))
+        if len(next(iter(color_wheel.values()))) == 4:
+            hue_offsets = calculate_anchor_hue_offsets(color_wheel)
+            bases = exact_bases(rgb, value)
+        else:
+            hue_offsets = calculate_hue_offsets(expanded)
+            bases = exact_bases(rgb)
+        return WheelTables(
+            MappingProxyType(expanded),
+            MappingProxyType(hue_offsets),
+            build_hue_index(hue_offsets),
+            calculate_wheel_hues(expanded),
+            bytes(k for color in rgb for k in color),
+            memoryview(array('d', saturation)).toreadonly(),
+            memoryview(array('d', value)).toreadonly(),
+            tuple(bases),
+        )
+
+    return _WHEEL_CACHE.get(freeze_color_wheel(color_wheel), build)
+
+
+def normalize_color_wheel(color_wheel, rate=15):
+    """
+    (rgb, saturation, value) lists of every paletton hue of the wheel
+
+    anchors are (r, g, b) or (r, g, b, value percent) and channels are
+    interpolated between neighbouring anchors. (r, g, b) hues take the hsv
+    saturation and value of their color, value anchored hues are fully
+    saturated with the interpolated value
+
+    >>> from .constants import COLOR_WHEEL
+    >>> rgb, saturation, value = normalize_color_wheel(COLOR_WHEEL)
+    >>> rgb[241], saturation[241], value[241]
+    ((2, 49, 202), 1.0, 0.79)
+    >>> rgb, saturation, value = normalize_color_wheel(COLOR_WHEEL_V3)
+    >>> rgb[0], saturation[0], value[0]
+    ((255, 0, 0), 1.0, 1.0)
+    """
+
+    return split_wheel_colors(interpolate_wheel(color_wheel, rate))
+
+
+def interpolate_wheel(color_wheel, rate=15):
+    """
+    list of the interpolated anchor colors of every paletton hue
+    """
+
+    from itertools import chain
+
+    anchors = [color_wheel[k] for k in sorted(color_wheel)]
+    return list(chain.from_iterable(
+        interpolate_anchors(start, stop, rate)
+        for start, stop in zip(anchors, anchors[1:] + anchors[:1])))
+
+
+def interpolate_anchors(start, stop, rate=15):
+    """
+    list of the rate colors from the anchor start towards the anchor stop,
+    channels are rounded to integers
+    >>> interpolate_anchors((255, 0, 0), (255, 51, 0))[:3]
+    [(255, 0, 0), (255, 3, 0), (255, 7, 0)]
+    """
+
+    channels = []
+    for a, b in zip(start, stop):
+        if rate % 2 and isinstance(a, int) and isinstance(b, int):
+            channels.append(fixed_point.interpolate(a, b, rate))
+        else:
+            channels.append([round(k) for k in linspace(
+                a, b, rate, endpoint=False)])
+    return list(zip(*channels))
+
+
+def split_wheel_colors(colors):
+    """
+    (rgb, saturation, value) lists of interpolated (r, g, b) or
+    (r, g, b, value percent) colors, see normalize_color_wheel
+    """
+
+    if len(colors[0]) == 4:
+        return ([color[:3] for color in colors], [1.] * len(colors),
+                [color[3] / 100 for color in colors])
+    sv = [_hsv_base(color) for color in colors]
+    return colors, [s for s, _ in sv], [v for _, v in sv]
+
+
+def exact_bases(rgb, value=None):
+    """
+    list of the fixed_point fractions of the base saturation and value of
+    normalized wheel colors, value is given for value anchored colors
+    >>> exact_bases([(255, 51, 0)])
+    [(255, 255, 255, 255)]
+    >>> exact_bases([(2, 49, 202)], [0.79])
+    [(1, 1, 79, 100)]
+    """
+
+    if value is None:
+        return [fixed_point.rgb_base(color) for color in rgb]
+    # value anchored colors are fully saturated, values are whole percents
+    return [(1, 1, round(k * 100), 100) for k in value]
+
+
+def get_scheme(scheme):
+    """
+    hue offsets of the scheme, given by name or as offsets themselves
+    >>> get_scheme('adjacent')
+    (0, -30, 30)
+    >>> get_scheme((0, 90))
+    (0, 90)
+    """
+
+    if isinstance(scheme, str):
+        return SCHEMES[scheme]
+    return tuple(scheme)
+
+
+def calculate_wheel_hues(expanded_color_wheel):
+    """
+    hsv hue (0 <= hue < 1) of every paletton hue of the expanded wheel
+    """
+
+    from colorsys import rgb_to_hsv
+    return tuple(
+        rgb_to_hsv(*expanded_color_wheel[k])[0]
+        for k in range(len(expanded_color_wheel))
+    )
 
 
 def calculate_hue_offsets(color_wheel):
@@ -39,23 +345,42 @@ def calculate_hue_offsets(color_wheel):
     }
 
 
-def expand_color_wheel(color_wheel=Paletton.COLOR_WHEEL):
-    def expand_color(l, rate=15):
-        from itertools import chain
-        return (
-            tuple(
-                chain.from_iterable(
-                    (linspace(l[i], l[i+1], rate, endpoint=False)
-                     for i in range(len(l)-1))
-                )
-            ) + tuple(linspace(l[-1], l[0], rate, endpoint=False))
-        )
+def calculate_anchor_hue_offsets(color_wheel):
+    """
+    hue offsets of a value wheel, hues between its anchors are looked up
+    by linear interpolation between the anchors alone
+    >>> calculate_anchor_hue_offsets({0: (255, 0, 0, 90), 90: (0, 99, 0, 80)})
+    {0.0: 0, 120.0: 90}
+    """
+
+    from colorsys import rgb_to_hsv
+    return {rgb_to_hsv(*color_wheel[k][:3])[0] * 360: k
+            for k in sorted(color_wheel)}
+
+
+def build_hue_index(hue_offsets):
+    """
+    sorted (hsv hues, paletton hues) pair of tuples for bisect lookups
+    both ends are padded with the wrapped neighbours so that any
+    0 <= hue < 360 falls between two entries
+    >>> build_hue_index({10: 12, 200: 210})
+    ((-160, 10, 200, 370), (-150, 12, 210, 372))
+    """
+
+    keys = sorted(hue_offsets)
+    values = [hue_offsets[k] for k in keys]
+    return (
+        tuple([keys[-1] - 360] + keys + [keys[0] + 360]),
+        tuple([values[-1] - 360] + values + [values[0] + 360]),
+    )
 
-    r, g, b = (expand_color(color, 15) for color in
-               zip(*(color_wheel[c] for c in sorted(color_wheel.keys()))))
-    return {k: v for k, v in enumerate(
-        tuple(round(k) for k in rgb) for rgb in zip(r, g, b)
-    )}
+
+def expand_color_wheel(color_wheel=Paletton.COLOR_WHEEL):
+    """
+    {paletton hue: (r, g, b)} of every hue, see interpolate_wheel
+    """
+    return {hue: color[:3]
+            for hue, color in enumerate(interpolate_wheel(color_wheel))}
 
 
 def make_sv_variations(rgb, preset):
@@ -73,20 +398,30 @@ def make_sv_variations(rgb, preset):
     [0.5, 1.0]
     """
 
-    from colorsys import rgb_to_hsv
+    return sv_variations(preset, *_hsv_base(rgb))
+
 
-    def calc(x, base_data):
-        x = -x * base_data if x < 0 else x
-        return 1 if x > 1 else 0 if x < 0 else x
+def sv_variations(preset, base_saturation, base_value):
+    """
+    generator of the (saturation, value) pairs of the preset for a
+    color of base_saturation and base_value, negative ratios of the
+    preset are relative to the base
+
+    >>> list(sv_variations(((1, -0.5), (0.25, 1)), 1., 0.8))
+    [(1, 0.4), (0.25, 1)]
+    """
 
-    base_saturation, base_value = rgb_to_hsv(
-        *[k / 255 for k in rgb])[1:]
     return (
-        (calc(s, base_saturation), calc(v, base_value))
+        (_clamp_ratio(s, base_saturation), _clamp_ratio(v, base_value))
         for s, v in preset
     )
 
 
+def _clamp_ratio(x, base_data):
+    x = -x * base_data if x < 0 else x
+    return 1 if x > 1 else 0 if x < 0 else x
+
+
 def variations_generator(rgb, sv_variations):
     """
 
@@ -95,21 +430,339 @@ def variations_generator(rgb, sv_variations):
     ...     sv_vars = make_sv_variations(rgb, preset)
     ...     print_hex_variations(variations_generator(rgb, sv_vars))
     #FF6363 #FF3939 #FF0000 #C50000 #9B0000
-    #54D954 #2ECF2E #00CC00 #009E00 #007C00
+    #63FF63 #39FF39 #00FF00 #00C500 #009B00
+    """
+    yield from rgb_tones(rgb, sv_variations)
+
+
+def rgb_tones(rgb, sv_pairs):
+    """
+    tuple of the tone rgb tuples of the color for (saturation, value)
+    pairs, the float arithmetic every tone of the package goes through
+    >>> rgb_tones((255, 0, 0), ((1, 0.7725), (0.61, 1)))
+    ((197, 0, 0), (255, 99, 99))
     """
-    max_rgb = max(rgb)
-    for s, v in sv_variations:
+
+    r, g, b = rgb
+    max_rgb = max(r, g, b)
+    tones = []
+    for s, v in sv_pairs:
         v *= 255
         k = v / max_rgb if max_rgb > 0 else 0
-        yield tuple(
-            min(255, round(v - (v - color * k) * s))
-            for color in rgb
-        )
+        tones.append((min(255, round(v - (v - r * k) * s)),
+                      min(255, round(v - (v - g * k) * s)),
+                      min(255, round(v - (v - b * k) * s))))
+    return tuple(tones)
 
 
 def print_hex_variations(variations_generator):
-    print(*["#" + "".join(["%02X" % k for k in rgb])
-            for rgb in variations_generator])
+    print(*[to_hex(rgb) for rgb in variations_generator])
+
+
+def to_hex(rgb):
+    """
+    >>> to_hex((255, 0, 10))
+    '#FF000A'
+    """
+    return "#%02X%02X%02X" % tuple(rgb)
+
+
+def freeze_color_wheel(color_wheel):
+    """
+    hashable snapshot of the color wheel contents
+    >>> freeze_color_wheel({15: [1, 2, 3], 0: (4, 5, 6)})
+    ((0, (4, 5, 6)), (15, (1, 2, 3)))
+    """
+    return tuple(sorted((k, tuple(v)) for k, v in color_wheel.items()))
+
+
+def color_wheel_digest(color_wheel):
+    """
+    sha256 hex digest of the color wheel contents, stable across processes
+    >>> color_wheel_digest({0: [255, 0, 0]}) == color_wheel_digest(
+    ...     {0: (255, 0, 0)})
+    True
+    """
+    from hashlib import sha256
+    return sha256(
+        repr(freeze_color_wheel(color_wheel)).encode('ascii')).hexdigest()
+
+
+def tone_table(color_wheel, preset):
+    """
+    immutable table of 360 tone rows, one per paletton hue
+    each row holds a Tone(rgb, hex) for every (s, v) pair of the preset
+    built on first request and shared for the same wheel and preset
+    >>> table = tone_table(COLOR_WHEEL_V3, PRESETS_V3['pastel'])
+    >>> len(table), len(table[0])
+    (360, 5)
+    >>> table[0][0]
+    Tone(rgb=(255, 170, 170), hex='#FFAAAA')
+    >>> table is tone_table(dict(COLOR_WHEEL_V3), PRESETS_V3['pastel'])
+    True
+    """
+
+    def build():
+        return tuple(
+            tuple(Tone(tone, to_hex(tone)) for tone in tones)
+            for tones in wheel_tones(wheel_tables(color_wheel), preset))
+
+    preset = tuple(tuple(sv) for sv in preset)
+    return _TONE_CACHE.get((freeze_color_wheel(color_wheel), preset), build)
+
+
+def wheel_tones(tables, preset):
+    """
+    generator of the tuple of tone rgb tuples of every hue of WheelTables
+    """
+
+    rgb, saturation, value = tables.rgb, tables.saturation, tables.value
+    exact_base = tables.exact_base
+    for hue in range(len(saturation)):
+        yield color_tones(rgb[3 * hue:3 * hue + 3], preset,
+                          (saturation[hue], value[hue]), exact_base[hue])
+
+
+def color_tones(rgb, preset, base=None, exact_base=None):
+    """
+    tuple of the tone rgb tuples of an 8-bit color for the preset
+
+    base is the (saturation, value) the preset scales, the hsv of rgb by
+    default, exact_base the same as fixed_point fractions. tones are
+    computed with fixed_point when FIXED_POINT is set and the base is
+    known exactly, near ties and the rest with rgb_tones
+    >>> color_tones((255, 0, 0), PRESETS_V3['pastel'])[:2]
+    ((255, 170, 170), (212, 106, 106))
+    """
+
+    fixed = None
+    if FIXED_POINT and (base is None or exact_base is not None):
+        fixed = _fixed_preset(preset)
+    if fixed is None:
+        if base is None:
+            base = _hsv_base(rgb)
+        return rgb_tones(rgb, sv_variations(preset, *base))
+
+    tones = fixed_point.fixed_tones(
+        rgb, exact_base or fixed_point.rgb_base(rgb), fixed)
+    if None not in tones:
+        return tones
+    ties = [sv for tone, sv in zip(tones, preset) if tone is None]
+    if base is None:
+        # only negative ratios read the base
+        base = _hsv_base(rgb) if min(map(min, ties)) < 0 else (None, None)
+    filled = iter(rgb_tones(rgb, sv_variations(ties, *base)))
+    return tuple(next(filled) if tone is None else tone for tone in tones)
+
+
+def _hsv_base(rgb):
+    from colorsys import rgb_to_hsv
+    return rgb_to_hsv(*[k / 255 for k in rgb])[1:]
+
+
+def make_tones(rgb, preset):
+    """
+    tuple of Tone(rgb, hex) for every (s, v) pair of the preset
+    >>> make_tones((255, 0, 0), PRESETS_V3['full_colors'])[0]
+    Tone(rgb=(255, 99, 99), hex='#FF6363')
+    """
+
+    return tuple(Tone(tone, to_hex(tone))
+                 for tone in color_tones(rgb, preset))
+
+
+def _fixed_preset(preset):
+    try:
+        return fixed_point.fixed_preset(preset)
+    except TypeError:
+        # unhashable preset
+        return fixed_point.fixed_preset(tuple(map(tuple, preset)))
+
+
+class ColorWheel(Mapping):
+    """
+    mutable color wheel for editors changing one anchor at a time,
+    anchors are (r, g, b) or (r, g, b, value percent) like the
+    COLOR_WHEEL of Paletton
+
+    setting an anchor re-expands only the two 15 degree segments around
+    it and updates the hue offsets, hue index, wheel hues and tone rows
+    of the changed paletton hues in place. Paletton(COLOR_WHEEL=wheel)
+    shares these tables, so it sees every change
+
+    >>> wheel = ColorWheel()
+    >>> p = Paletton(COLOR_WHEEL=wheel)
+    >>> p.tones(20)[2].hex
+    '#FF5700'
+    >>> sorted(wheel.set_anchor(30, (255, 80, 0)))[::7]
+    [16, 23, 30, 37, 44]
+    >>> p.tones(20)[2].hex
+    '#FF4B00'
+    >>> fresh = Paletton(COLOR_WHEEL=dict(wheel))
+    >>> p.EXPANDED_COLOR_WHEEL == fresh.EXPANDED_COLOR_WHEEL
+    True
+    """
+
+    RATE = 15
+
+    def __init__(self, color_wheel=COLOR_WHEEL_V3):
+        self._anchors = {k: tuple(v) for k, v in color_wheel.items()}
+        self._keys = sorted(self._anchors)
+        self._value_wheel = len(self._anchors[self._keys[0]]) == 4
+        rgb, self.saturation, self.value = normalize_color_wheel(
+            self._anchors, self.RATE)
+        self.exact_base = exact_bases(
+            rgb, self.value if self._value_wheel else None)
+        self.expanded = dict(enumerate(rgb))
+        self.wheel_hues = list(calculate_wheel_hues(self.expanded))
+        # hsv hue -> paletton hues having it, the largest one wins in
+        # hue_offsets, like in calculate_hue_offsets
+        self._offset_keys = [None] * len(self.expanded)
+        self._offset_members = {}
+        if self._value_wheel:
+            self.hue_offsets = calculate_anchor_hue_offsets(self._anchors)
+        else:
+            self.hue_offsets = calculate_hue_offsets(self.expanded)
+            for hue in range(len(self.expanded)):
+                self._add_offset(hue)
+        self.hue_index = [list(k) for k in build_hue_index(self.hue_offsets)]
+        # preset -> list of tone rows, None until requested
+        self._tone_rows = {}
+
+    def __getitem__(self, key):
+        return self._anchors[key]
+
+    def __iter__(self):
+        return iter(self._anchors)
+
+    def __len__(self):
+        return len(self._anchors)
+
+    def __setitem__(self, key, rgb):
+        self.set_anchor(key, rgb)
+
+    def _add_offset(self, hue):
+        from colorsys import rgb_to_hsv
+        key = round(
+            rgb_to_hsv(*[k / 255 for k in self.expanded[hue]])[0] * 360)
+        self._offset_keys[hue] = key
+        self._offset_members.setdefault(key, set()).add(hue)
+        return key
+
+    def _remove_offset(self, hue):
+        key = self._offset_keys[hue]
+        self._offset_members[key].discard(hue)
+        return key
+
+    def set_anchor(self, key, color):
+        """
+        change the anchor of an existing wheel hue, an (r, g, b) or an
+        (r, g, b, value percent) like the other anchors,
+        return the set of paletton hues whose tones changed
+
+        >>> from .constants import COLOR_WHEEL
+        >>> wheel = ColorWheel(COLOR_WHEEL)
+        >>> len(wheel.set_anchor(15, (255, 60, 0, 90)))
+        29
+        """
+
+        from colorsys import rgb_to_hsv
+        if key not in self._anchors:
+            raise KeyError("%r is not an anchor of the color wheel" % key)
+        if len(color) != len(self._anchors[key]):
+            raise ValueError("anchors of this color wheel have %d channels"
+                             % len(self._anchors[key]))
+        self._anchors[key] = tuple(color)
+
+        keys, rate = self._keys, self.RATE
+        i = keys.index(key)
+        changed = set()
+        for segment in (i - 1) % len(keys), i:
+            rgb, saturation, value = split_wheel_colors(interpolate_anchors(
+                self._anchors[keys[segment]],
+                self._anchors[keys[(segment + 1) % len(keys)]], rate))
+            bases = exact_bases(rgb, value if self._value_wheel else None)
+            for hue, color, s, v, base in zip(
+                    range(segment * rate, (segment + 1) * rate),
+                    rgb, saturation, value, bases):
+                if (color, v) != (self.expanded[hue], self.value[hue]):
+                    self.expanded[hue] = color
+                    self.saturation[hue], self.value[hue] = s, v
+                    self.exact_base[hue] = base
+                    changed.add(hue)
+
+        for hue in changed:
+            self.wheel_hues[hue] = rgb_to_hsv(*self.expanded[hue])[0]
+        if self._value_wheel:
+            hue_offsets = calculate_anchor_hue_offsets(self._anchors)
+            if hue_offsets != self.hue_offsets:
+                self.hue_offsets.clear()
+                self.hue_offsets.update(hue_offsets)
+                self._update_hue_index()
+        else:
+            self._update_offsets(changed)
+
+        for rows in self._tone_rows.values():
+            for hue in changed:
+                rows[hue] = None
+        return changed
+
+    def _update_offsets(self, changed):
+        offset_keys = set()
+        for hue in changed:
+            offset_keys.add(self._remove_offset(hue))
+            offset_keys.add(self._add_offset(hue))
+        for offset_key in offset_keys:
+            members = self._offset_members[offset_key]
+            if members:
+                self.hue_offsets[offset_key] = max(members)
+            else:
+                del self._offset_members[offset_key]
+                self.hue_offsets.pop(offset_key, None)
+        if offset_keys:
+            self._update_hue_index()
+
+    def _update_hue_index(self):
+        for old, new in zip(self.hue_index,
+                            build_hue_index(self.hue_offsets)):
+            old[:] = new
+
+    def tone_rows(self, preset):
+        """
+        360 tone rows for the preset, a row is computed when first read
+        and recomputed after its hue changed
+        """
+
+        preset = tuple(tuple(sv) for sv in preset)
+        rows = self._tone_rows.get(preset)
+        if rows is None:
+            rows = self._tone_rows[preset] = ToneRows(self, preset)
+        return rows
+
+
+class ToneRows(list):
+    """
+    tone rows of a ColorWheel, None entries are filled on access
+    """
+
+    def __init__(self, wheel, preset):
+        super().__init__([None] * len(wheel.expanded))
+        self._wheel = wheel
+        self._preset = preset
+
+    def __getitem__(self, hue):
+        row = super().__getitem__(hue)
+        if row is None:
+            wheel = self._wheel
+            row = tuple(Tone(tone, to_hex(tone)) for tone in color_tones(
+                wheel.expanded[hue], self._preset,
+                (wheel.saturation[hue], wheel.value[hue]),
+                wheel.exact_base[hue]))
+            self[hue] = row
+        return row
+
+    def __iter__(self):
+        return (self[hue] for hue in range(len(self)))
 
 
 def from_paletton_hue_to_rgb(hue, paletton):
@@ -129,18 +782,41 @@ def from_paletton_hue_to_rgb(hue, paletton):
 
 def from_rgb_to_paletton_hue(rgb, paletton):
     """
+    find the hsv hue in paletton.HUE_INDEX with bisect and interpolate
+    between the two closest paletton hues
     >>> p = Paletton()
     >>> print(from_rgb_to_paletton_hue((120, 0, 106), p))
     318
+    >>> print(from_rgb_to_paletton_hue((255, 0, 0), p))
+    0
+    >>> print(from_rgb_to_paletton_hue((255, 0, 3), p))
+    359
     """
     from colorsys import rgb_to_hsv
-    rhs_hue = round(rgb_to_hsv(*rgb)[0]*360)
-    if rhs_hue not in paletton.HUE_OFFSETS:
-        keys = sorted(paletton.HUE_OFFSETS.keys())
-        closest_offset_index = sorted(keys + [rhs_hue]).index(rhs_hue)
-        rhs_hue = keys[closest_offset_index-1]
+    return from_hsv_hue_to_paletton_hue(rgb_to_hsv(*rgb)[0], paletton)
+
 
-    return paletton.HUE_OFFSETS[rhs_hue]
+def from_hsv_hue_to_paletton_hue(hue, paletton):
+    """
+    paletton hue of the hsv hue, 0 <= hue < 1
+    >>> print(from_hsv_hue_to_paletton_hue(2 / 3, Paletton()))
+    255
+    """
+    return lookup_paletton_hue(hue, paletton.HUE_INDEX)
+
+
+def lookup_paletton_hue(hue, hue_index):
+    """
+    paletton hue of the hsv hue, 0 <= hue < 1, in a hue index from
+    build_hue_index
+    """
+    hue = hue * 360
+    keys, values = hue_index
+    i = bisect_left(keys, hue)
+    if keys[i] == hue:
+        return values[i] % 360
+    k = (hue - keys[i-1]) / (keys[i] - keys[i-1])
+    return round(values[i-1] + k * (values[i] - values[i-1])) % 360
 
 
 def linspace(start, stop, num, endpoint=True):
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+palette generation for large batches of colors
+
+colors are sent to worker processes as packed 24-bit rgb bytes and the
+tones come back the same way, so nothing but bytes and the wheel and
+preset tables of a cache is pickled
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from time import perf_counter
+
+
+def pack_colors(colors):
+    """
+    pack hex strings or Color objects into 3 bytes per color
+    >>> pack_colors(['#FF0000', '#0a0B0c', '#FFF'])
+    b'\\xff\\x00\\x00\\n\\x0b\\x0c\\xff\\xff\\xff'
+    """
+
+    data = bytearray()
+    for color in colors:
+        if not isinstance(color, str):
+            color = color.hex
+        digits = color.lstrip('#')
+        if len(digits) == 3:
+            digits = ''.join(k * 2 for k in digits)
+        data += bytes.fromhex(digits)
+    return bytes(data)
+
+
+def generate_packed(data, engine='paletton', scheme='mono', preset='pastel',
+                    color_wheel=None, presets=None):
+    """
+    take packed rgb colors, return (bases, tones, packed tones)
+    where every color got bases * tones tones of 3 bytes each
+
+    engine 'paletton' snaps colors to the paletton wheel and reads
+    tones from Paletton.scheme, of the default tables unless color_wheel
+    or presets are given, 'hsv' runs generate_palette
+
+    >>> from .paletton import to_hex
+    >>> bases, tones, packed = generate_packed(b'\\xff\\x00\\x00')
+    >>> bases, tones, [to_hex(packed[i:i+3]) for i in range(0, 15, 3)]
+    (1, 5, ['#FFAAAA', '#D46A6A', '#A83939', '#801616', '#540000'])
+    """
+
+    out = bytearray()
+    rows = []
+    colors = (data[i:i + 3] for i in range(0, len(data), 3))
+    if engine == 'paletton':
+        from .paletton import get_paletton, from_rgb_to_paletton_hue
+        paletton = get_paletton(color_wheel, presets)
+        for rgb in colors:
+            hue = from_rgb_to_paletton_hue(tuple(rgb), paletton)
+            rows = paletton.scheme(hue, scheme, preset)
+            for tones in rows:
+                for tone in tones:
+                    out += bytes(tone.rgb)
+    else:
+        from .color_scheme_generator import Color, generate_palette
+        for rgb in colors:
+            color = Color(rgb=tuple(k / 255 for k in rgb))
+            rows = [list(tones) for tones in generate_palette(
+                color, scheme, preset).tones()]
+            for tones in rows:
+                for tone in tones:
+                    out += bytes(round(k * 255) for k in tone.rgb)
+    bases = len(rows)
+    return bases, len(rows[0]) if bases else 0, bytes(out)
+
+
+def unpack_palettes(colors, bases, tones, packed):
+    """
+    yield (color, tuple of tone hex rows) for every input color
+    >>> list(unpack_palettes(['#F00'], 1, 2, bytes((255, 0, 0, 10, 11, 12))))
+    [('#F00', (('#FF0000', '#0A0B0C'),))]
+    """
+
+    # one C level conversion for the whole chunk, 6 hex digits per tone
+    digits = packed.hex().upper()
+    row_size = tones * 6
+    size = bases * row_size
+    for i, color in enumerate(colors):
+        start = i * size
+        yield color, tuple(
+            tuple('#' + digits[j:j + 6] for j in range(row, row + row_size, 6))
+            for row in range(start, start + size, row_size)
+        )
+
+
+def _generate_chunk(args):
+    return generate_packed(*args)
+
+
+def generate_palettes(colors, workers=1, chunksize=1024, engine='paletton',
+                      scheme='mono', preset='pastel', stats=None, cache=None):
+    """
+    yield (color, tuple of tone hex rows) for every color in colors,
+    in input order. colors are hex strings or Color objects
+
+    with workers > 1 chunks of chunksize colors are generated in a process
+    pool, at most 2 * workers chunks are in flight so memory stays bounded
+    when stats dict is given it is filled with count, seconds and
+    colors_per_second once the generator is exhausted
+    with a disk_cache.PaletteCache only colors missing from it are
+    generated, from the color wheel and presets of the cache, and their
+    palettes are stored in it
+
+    >>> for color, rows in generate_palettes(['#FF0000'], preset='pastel'):
+    ...     print(color, *rows[0])
+    #FF0000 #FFAAAA #D46A6A #A83939 #801616 #540000
+    """
+
+    started = perf_counter()
+    count = 0
+    colors = iter(colors)
+    chunks = iter(lambda: list(islice(colors, chunksize)), [])
+
+    def lookup(chunk):
+        """
+        return (chunk, keys, cached rows, colors still to generate)
+        """
+        if cache is None:
+            return chunk, None, None, chunk
+        from .disk_cache import palette_keys
+        keys = palette_keys(pack_colors(chunk), engine, scheme, preset,
+                            cache.paletton)
+        hits = cache.get_many(keys)
+        misses = [color for color, key in zip(chunk, keys) if key not in hits]
+        return chunk, keys, hits, misses
+
+    # the tables travel to the workers, Paletton objects do not pickle
+    tables = (None, None)
+    if cache is not None:
+        tables = cache.color_wheel, cache.presets
+
+    def task(misses):
+        return (pack_colors(misses), engine, scheme, preset) + tables
+
+    def merge(chunk, keys, hits, misses, result):
+        generated = unpack_palettes(misses, *result) if misses else iter(())
+        if cache is None:
+            yield from generated
+            return
+        for color, key in zip(chunk, keys):
+            rows = hits.get(key)
+            if rows is None:
+                rows = next(generated)[1]
+                cache.put(key, rows)
+            yield color, rows
+
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as executor:
+            pending = deque()
+            for chunk in chunks:
+                split = lookup(chunk)
+                misses = split[-1]
+                future = (executor.submit(_generate_chunk, task(misses))
+                          if misses else None)
+                pending.append((split, future))
+                if len(pending) >= 2 * workers:
+                    split, future = pending.popleft()
+                    count += len(split[0])
+                    yield from merge(*split, future and future.result())
+            while pending:
+                split, future = pending.popleft()
+                count += len(split[0])
+                yield from merge(*split, future and future.result())
+    else:
+        for chunk in chunks:
+            split = lookup(chunk)
+            misses = split[-1]
+            count += len(chunk)
+            yield from merge(
+                *split, _generate_chunk(task(misses)) if misses else None)
+    if cache is not None:
+        cache.flush()
+
+    if stats is not None:
+        seconds = perf_counter() - started
+        stats.update(
+            count=count, seconds=seconds,
+            colors_per_second=count / seconds if seconds else 0.,
+        )
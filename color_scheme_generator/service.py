@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio palette service
+
+requests arriving within max_delay of each other are batched per scheme
+and preset into one generate_packed call run in an executor, so the event
+loop never blocks on palette generation
+
+    async with PaletteService() as service:
+        rows = await service.palette('#FF0000', 'triad')
+
+serve_http puts a minimal HTTP/1.1 front end on top of it, meant for
+localhost use and testing, not for the open internet
+"""
+
+import asyncio
+import json
+from collections import deque
+from time import perf_counter
+from urllib.parse import parse_qsl, urlsplit
+
+from .constants import PRESETS_V3, SCHEMES
+from .parallel import generate_packed, pack_colors, unpack_palettes
+
+
+def percentile(values, q):
+    """
+    nearest-rank percentile of a sorted list
+    >>> percentile([1, 2, 3, 4], 50), percentile([1, 2, 3, 4], 100)
+    (2, 4)
+    """
+    if not values:
+        return 0.
+    return values[max(0, -(-len(values) * q // 100) - 1)]
+
+
+class PaletteService:
+    """
+    batching async front end to parallel.generate_packed
+
+    at most max_pending requests are queued, further callers wait for a
+    slot. a batch is sent to the executor when it reaches max_batch colors
+    or max_delay seconds after its first request. executor defaults to
+    the loop default thread pool, pass a ProcessPoolExecutor to use more
+    than one core
+
+    >>> async def main():
+    ...     async with PaletteService() as service:
+    ...         return await asyncio.gather(*(
+    ...             service.palette(color) for color in ('#F00', '#00F')))
+    >>> for rows in asyncio.run(main()):
+    ...     print(*rows[0])
+    #FFAAAA #D46A6A #A83939 #801616 #540000
+    #B7B7FF #7A7AD4 #4A4AA8 #262680 #0D0D54
+    """
+
+    def __init__(self, engine='paletton', max_batch=256, max_delay=0.001,
+                 max_pending=1024, executor=None, history=10000):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.executor = executor
+        self._slots = asyncio.Semaphore(max_pending)
+        self._waiting = 0
+        self._batches = {}
+        self._timers = {}
+        self._tasks = set()
+        self._latencies = deque(maxlen=history)
+        self._requests = 0
+        self._batch_count = 0
+        self._batch_colors = 0
+
+    @property
+    def pending(self):
+        """
+        number of requests waiting for a slot or their palette
+        """
+        return self._waiting
+
+    def full(self):
+        return self._waiting >= self.max_pending
+
+    async def palette(self, color, scheme='mono', preset='pastel'):
+        """
+        tuple of tone hex rows of color, a hex string or a Color
+        raises ValueError for bad colors, schemes and presets
+        """
+
+        started = perf_counter()
+        data = pack_colors([color])
+        if len(data) != 3:
+            raise ValueError("%r is not a hex color" % (color,))
+        if scheme not in SCHEMES:
+            raise ValueError("unknown scheme %r" % (scheme,))
+        if preset not in PRESETS_V3:
+            raise ValueError("unknown preset %r" % (preset,))
+        self._waiting += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                future = loop.create_future()
+                key = scheme, preset
+                batch = self._batches.setdefault(key, [])
+                batch.append((color, data, future))
+                if len(batch) >= self.max_batch:
+                    self._flush(key)
+                elif key not in self._timers:
+                    self._timers[key] = loop.call_later(
+                        self.max_delay, self._flush, key)
+                rows = await future
+        finally:
+            self._waiting -= 1
+        self._requests += 1
+        self._latencies.append(perf_counter() - started)
+        return rows
+
+    def _flush(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._batches.pop(key, None)
+        if batch:
+            task = asyncio.get_running_loop().create_task(
+                self._generate(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _generate(self, key, batch):
+        colors = [color for color, _, _ in batch]
+        data = b''.join(data for _, data, _ in batch)
+        self._batch_count += 1
+        self._batch_colors += len(batch)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.executor, generate_packed, data, self.engine, *key)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        records = unpack_palettes(colors, *result)
+        for (_, _, future), (_, rows) in zip(batch, records):
+            if not future.done():
+                future.set_result(rows)
+
+    async def drain(self):
+        """
+        send all queued batches and wait for them
+        """
+        for key in list(self._batches):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    def metrics(self):
+        """
+        dict of request and batch counters and latency percentiles in ms
+        over the last history requests
+        """
+
+        latencies = sorted(self._latencies)
+        return dict(
+            requests=self._requests,
+            pending=self.pending,
+            batches=self._batch_count,
+            mean_batch_size=(self._batch_colors / self._batch_count
+                             if self._batch_count else 0.),
+            latency_ms={
+                name: percentile(latencies, q) * 1e3
+                for name, q in (('p50', 50), ('p90', 90), ('p99', 99),
+                                ('max', 100))
+            },
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.drain()
+
+
+def _response(writer, status, body):
+    reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+              405: 'Method Not Allowed', 503: 'Service Unavailable'}[status]
+    body = json.dumps(body).encode('utf-8')
+    writer.write(
+        b'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n'
+        b'Content-Length: %d\r\nConnection: close\r\n\r\n' % (
+            status, reason.encode('ascii'), len(body)) + body)
+
+
+async def handle_http(service, reader, writer):
+    """
+    GET /palette?color=FF0000&scheme=mono&preset=pastel
+    GET /metrics
+    """
+
+    try:
+        request = (await reader.readline()).decode('latin-1').split()
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        if len(request) != 3:
+            return _response(writer, 400, dict(error="bad request line"))
+        method, target, _ = request
+        url = urlsplit(target)
+        if method != 'GET':
+            return _response(writer, 405, dict(error="only GET is supported"))
+        if url.path == '/metrics':
+            return _response(writer, 200, service.metrics())
+        if url.path != '/palette':
+            return _response(writer, 404, dict(error="unknown path"))
+        if service.full():
+            return _response(writer, 503, dict(error="too many requests"))
+        query = dict(parse_qsl(url.query))
+        color = query.get('color', '')
+        try:
+            rows = await service.palette(
+                color, query.get('scheme', 'mono'),
+                query.get('preset', 'pastel'))
+        except ValueError as e:
+            return _response(writer, 400, dict(error=str(e)))
+        _response(writer, 200, dict(color=color, palette=rows))
+    finally:
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+
+async def serve_http(service, host='127.0.0.1', port=8000):
+    """
+    start serving service over HTTP, return the asyncio Server
+    """
+
+    async def handle(reader, writer):
+        await handle_http(service, reader, writer)
+    return await asyncio.start_server(handle, host, port)
@@ -1,16 +1,154 @@
 
-import logging as log
-log.basicConfig(level=log.DEBUG)
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
 
-from color_scheme_generator.constants import (
+from .constants import (
     RGB_tuple,
 )
 
+# log from_rgb_to_paletton_hue lookups at debug level,
+# logging is imported only when this is switched on
+DEBUG = False
+
+
+class LRUCache:
+    """
+    thread-safe mapping of at most maxsize entries, the least recently
+    used entries are evicted first. values are computed outside the lock,
+    when two threads race the first stored value wins
+
+    >>> cache = LRUCache(2)
+    >>> cache.get('a', lambda: 1), cache.get('b', lambda: 2)
+    (1, 2)
+    >>> cache.get('a', lambda: 0), cache.get('c', lambda: 3)
+    (1, 3)
+    >>> 'b' in cache, 'a' in cache
+    (False, True)
+    >>> cache.info()
+    {'hits': 1, 'misses': 3, 'maxsize': 2, 'currsize': 2, 'hit_rate': 0.25}
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, factory):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+        value = factory()
+        with self._lock:
+            self.misses += 1
+            value = self._data.setdefault(key, value)
+            self._data.move_to_end(key)
+            self._evict()
+        return value
+
+    def _evict(self):
+        while self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        calls = self.hits + self.misses
+        return dict(
+            hits=self.hits, misses=self.misses,
+            maxsize=self.maxsize, currsize=len(self._data),
+            hit_rate=self.hits / calls if calls else 0.,
+        )
+
+
+# bound of the hex_to_rgb and rgb_to_hex caches, see set_hex_cache_size
+HEX_CACHE_SIZE = 1024
+
+
+def _hex_to_rgb(_hex):
+    _hex = _hex.strip('#')
+    n = len(_hex) // 3
+    if len(_hex) == 3:
+        r = int(_hex[:n] * 2, 16)
+        g = int(_hex[n:2 * n] * 2, 16)
+        b = int(_hex[2 * n:3 * n] * 2, 16)
+    else:
+        r = int(_hex[:n], 16)
+        g = int(_hex[n:2 * n], 16)
+        b = int(_hex[2 * n:3 * n], 16)
+    return RGB_tuple(*(k/255 for k in (r, g, b)))
+
+
+def _rgb_to_hex(rgb):
+    r, g, b = rgb
+    return "#%02X%02X%02X" % (round(r*255), round(g*255), round(b*255))
+
+
+def set_hex_cache_size(maxsize=HEX_CACHE_SIZE):
+    """
+    (re)create hex conversion caches holding up to maxsize entries each,
+    least recently used entries are evicted first, None means unbounded
+    counters are reset
+    """
+
+    global _cached_hex_to_rgb, _cached_rgb_to_hex
+    _cached_hex_to_rgb = lru_cache(maxsize)(_hex_to_rgb)
+    _cached_rgb_to_hex = lru_cache(maxsize)(_rgb_to_hex)
+
+
+set_hex_cache_size()
+
+
+def hex_cache_info():
+    """
+    hits, misses, size and hit rate of the hex conversion caches
+
+    >>> set_hex_cache_size(2)
+    >>> for _hex in ('#FF0000', '#FF0000', '#00FF00', '#0000FF', '#FF0000'):
+    ...     _ = hex_to_rgb(_hex)
+    >>> info = hex_cache_info()['hex_to_rgb']
+    >>> info['hits'], info['misses'], info['currsize'], info['hit_rate']
+    (1, 4, 2, 0.2)
+    >>> set_hex_cache_size()
+    """
+
+    def info(cached):
+        hits, misses, maxsize, currsize = cached.cache_info()
+        calls = hits + misses
+        return dict(
+            hits=hits, misses=misses, maxsize=maxsize, currsize=currsize,
+            hit_rate=hits / calls if calls else 0.,
+        )
+
+    return dict(
+        hex_to_rgb=info(_cached_hex_to_rgb),
+        rgb_to_hex=info(_cached_rgb_to_hex),
+    )
+
 
 def hex_to_rgb(_hex):
     """
     Convert a HEX color representation to an RGB color representation.
     hex :: hex -> [000000, FFFFFF]
+    Results are cached, see set_hex_cache_size.
     :param _hex: The 3- or 6-char hexadecimal string
     representing the color value.
     :return: RGB representation of the input HEX value.
@@ -20,18 +158,10 @@ def hex_to_rgb(_hex):
     RGB_tuple(red=1.0, green=0.0, blue=0.0)
     >>> hex_to_rgb('#000000')
     RGB_tuple(red=0.0, green=0.0, blue=0.0)
+    >>> hex_to_rgb('#F00')
+    RGB_tuple(red=1.0, green=0.0, blue=0.0)
     """
-    _hex = _hex.strip('#')
-    n = len(_hex) // 3
-    if len(_hex) == 3:
-        r = int(_hex[:n] * 2, 16)
-        g = int(_hex[n:2 * n] * 2, 16)
-        b = int(_hex[2 * n:3 * n] * 2, 16)
-    else:
-        r = int(_hex[:n], 16)
-        g = int(_hex[n:2 * n], 16)
-        b = int(_hex[2 * n:3 * n], 16)
-    return RGB_tuple(*(k/255 for k in (r, g, b)))
+    return _cached_hex_to_rgb(_hex)
 
 
 def rgb_to_hex(rgb):
@@ -40,17 +170,39 @@ def rgb_to_hex(rgb):
     (r, g, b) :: r -> [0.0, 1.0]
                  g -> [0.0, 1.0]
                  b -> [0.0, 1.0]
+    Results are cached, see set_hex_cache_size.
     :param rgb: A tuple of three numeric values corresponding to the red,
     green, and blue value.
     :return: HEX representation of the input RGB value.
     :rtype: str
     >>> rgb_to_hex((1.0, 0.0, 0.0))
     '#FF0000'
+    >>> rgb_to_hex([0.0, 0.5, 0.04])
+    '#00800A'
+    """
+    try:
+        return _cached_rgb_to_hex(rgb)
+    except TypeError:
+        # unhashable sequence
+        return _cached_rgb_to_hex(tuple(rgb))
+
+
+def hex_to_rgb_bulk(hex_values):
+    """
+    list of hex_to_rgb results for a sequence of hex strings
+    >>> hex_to_rgb_bulk(['#FFFFFF', '#000'])[1]
+    RGB_tuple(red=0.0, green=0.0, blue=0.0)
     """
-    r, g, b = (k*255 for k in rgb)
-    return "#{0}{1}{2}".format(
-        *(hex(int(round(k)))[2:].zfill(2) for k in (r, g, b))
-    ).upper()
+    return list(map(_cached_hex_to_rgb, hex_values))
+
+
+def rgb_to_hex_bulk(rgb_values):
+    """
+    list of rgb_to_hex results for a sequence of rgb tuples
+    >>> rgb_to_hex_bulk([(1.0, 1.0, 1.0), (0.0, 0.0, 0.0)])
+    ['#FFFFFF', '#000000']
+    """
+    return list(map(rgb_to_hex, rgb_values))
 
 
 def ryb_to_rgb_nishita(R, Y, B):
@@ -128,6 +280,48 @@ def ryb_to_rgb(r, y, b):  # Assumption: r, y, b in [0, 1]
 # ------------------------- taken from color-scheme.js ----------------
 
 
+# copy of the color wheel last passed to the functions below and what was
+# derived from it, comparing a wheel to the copy is cheaper than freezing
+# it for the wheel_tables cache
+_LAST_WHEEL = (None, {})
+
+
+def _derived(color_wheel):
+    global _LAST_WHEEL
+    wheel, derived = _LAST_WHEEL
+    if color_wheel != wheel:
+        derived = {}
+        _LAST_WHEEL = {k: v if isinstance(v, tuple) else list(v)
+                       for k, v in color_wheel.items()}, derived
+    return derived
+
+
+def _wheel_tables(color_wheel):
+    derived = _derived(color_wheel)
+    if 'tables' not in derived:
+        from .paletton import wheel_tables
+        derived['tables'] = wheel_tables(color_wheel)
+    return derived['tables']
+
+
+def _anchor_hues(color_wheel):
+    """
+    hsv hues of the anchors in wheel order, the same sorted, and the
+    position of every hue in wheel order
+    """
+
+    derived = _derived(color_wheel)
+    if 'anchor_hues' not in derived:
+        from colorsys import rgb_to_hsv
+        wheel_hues = tuple(rgb_to_hsv(*color_wheel[k][:3])[0]
+                           for k in sorted(color_wheel))
+        positions = {}
+        for i, h in enumerate(wheel_hues):
+            positions.setdefault(h, i)
+        derived['anchor_hues'] = wheel_hues, sorted(wheel_hues), positions
+    return derived['anchor_hues']
+
+
 def from_paletton_hue_to_rgbvs(hue, color_wheel):
     """
     generate rgbsv tuples from the given 0 <= hue <=359
@@ -152,21 +346,10 @@ def from_paletton_hue_to_rgbvs(hue, color_wheel):
     (25, 25, 178, 1.0, 0.7)
     """
 
-    def avrg(a, b, k):
-        return a + round((b - a) * k)
-
-    hue = round(hue % 360)
-
-    d = hue % 15
-    k = d / 15.
-    derivative1 = hue - d
-    derivative2 = (derivative1 + 15) % 360
-    colorset1 = color_wheel[derivative1]
-    colorset2 = color_wheel[derivative2]
-
-    rgbv = tuple(avrg(c1, c2, k) for c1, c2 in zip(colorset1, colorset2))
-
-    return rgbv[:-1] + (1., rgbv[-1]/100)
+    tables = _wheel_tables(color_wheel)
+    hue = round(hue % 360) % 360
+    return tuple(tables.rgb[3 * hue:3 * hue + 3]) + (
+        tables.saturation[hue], tables.value[hue])
 
 
 def get_sv_variations(preset, base_saturation, base_value):
@@ -183,11 +366,8 @@ def get_sv_variations(preset, base_saturation, base_value):
     [0.5, 1]
     """
 
-    def calc(x, base_data):
-        x = -x * base_data if x < 0 else x
-        return 1 if x > 1 else 0 if x < 0 else x
-
-    return ((calc(s, base_saturation), calc(v, base_value)) for s, v in preset)
+    from .paletton import sv_variations
+    return sv_variations(preset, base_saturation, base_value)
 
 
 def variations_generator(rgbsv, sv_variations):
@@ -217,19 +397,103 @@ def variations_generator(rgbsv, sv_variations):
     #1919B2 #12127D #C8C8FF #9191FF
     """
 
-    max_rgb = max(rgbsv[:3])
-    for s, v in sv_variations:
-        v *= 255
-        k = v / max_rgb if max_rgb > 0 else 0
-        yield tuple(
-            min(255, round(v - (v - color * k) * s))
-            for color in rgbsv[:3]
-        )
+    from . import paletton
+    return paletton.variations_generator(rgbsv[:3], sv_variations)
+
+
+# 360 hue tone rows per (color wheel, preset), see sweep_table
+_SWEEP_CACHE = LRUCache(32)  # resized by paletton.set_wheel_cache_size
+
+
+def sweep_table(color_wheel, preset):
+    """
+    tuple of the tone rows of all 360 hues, see _sweep_tables
+    """
+    return _sweep_tables(color_wheel, preset)[0]
+
+
+def _sweep_tables(color_wheel, preset):
+    """
+    tone rows of all 360 hues and the rows as bytes, built once per color
+    wheel and preset from paletton.wheel_tables
+    """
+
+    def build():
+        rows = tuple(wheel_tones(wheel_tables(color_wheel), preset))
+        # rows and the same rows as r, g, b bytes for sweep
+        return rows, tuple(bytes(sum(tones, ())) for tones in rows)
+
+    from .paletton import freeze_color_wheel, wheel_tables, wheel_tones
+    preset = tuple(map(tuple, preset))
+    return _SWEEP_CACHE.get((freeze_color_wheel(color_wheel), preset), build)
+
+
+def _sweep_hues(hue_start, hue_stop, step, preset, color_wheel):
+    """
+    (hues, preset ratios, color wheel) of a sweep with defaults filled in
+    """
+
+    from math import ceil
+    from .constants import COLOR_WHEEL, PRESETS, PRESETS_V3
+
+    if step == 0:
+        raise ValueError("step must not be zero")
+    if color_wheel is None:
+        color_wheel = COLOR_WHEEL
+    if isinstance(preset, str):
+        preset = PRESETS[preset] if preset in PRESETS else PRESETS_V3[preset]
+    hues = (hue_start + i * step
+            for i in range(max(0, ceil((hue_stop - hue_start) / step))))
+    return hues, preset, color_wheel
+
+
+def iter_sweep(hue_start=0, hue_stop=360, step=1, preset='default',
+               color_wheel=None):
+    """
+    yield (hue, tuple of tone rgb tuples) for hues from hue_start up to
+    hue_stop by step, in order. rows come from sweep_table, so the whole
+    wheel is computed once per color wheel and preset
+
+    preset is a preset name or a sequence of (saturation, value) ratios,
+    color_wheel defaults to constants.COLOR_WHEEL
+
+    >>> for hue, tones in iter_sweep(240, 244, preset='default'):
+    ...     print(hue, end=' ')
+    ...     print_hex_variations(tones)
+    240 #0033CC #00248F #BFCFFF #809FFF
+    241 #0231C9 #01228D #C0CFFF #819EFF
+    242 #0330C9 #02228D #C0CEFF #819EFF
+    243 #052EC7 #03208B #C1CEFF #839DFF
+    """
+
+    hues, preset, color_wheel = _sweep_hues(
+        hue_start, hue_stop, step, preset, color_wheel)
+    rows = sweep_table(color_wheel, preset)
+    for hue in hues:
+        yield hue, rows[round(hue) % 360]
+
+
+def sweep(hue_start=0, hue_stop=360, step=1, preset='default',
+          color_wheel=None):
+    """
+    tones of iter_sweep as one flat array('B') of r, g, b bytes, hue by
+    hue and tone by tone. numpy.frombuffer(result, numpy.uint8).reshape(
+    -1, len(preset), 3) views it as a (hues, tones, 3) array without copying
+
+    >>> tones = sweep(0, 360, 15, 'default')
+    >>> len(tones) // (4 * 3), tuple(tones[:3])
+    (24, (255, 0, 0))
+    """
+
+    hues, preset, color_wheel = _sweep_hues(
+        hue_start, hue_stop, step, preset, color_wheel)
+    rows = _sweep_tables(color_wheel, preset)[1]
+    return array('B', b''.join([rows[round(hue) % 360] for hue in hues]))
 
 
 def print_hex_variations(variations_generator):
-    print(*["#" + "".join(["%02X" % k for k in rgb])
-            for rgb in variations_generator])
+    from . import paletton
+    paletton.print_hex_variations(variations_generator)
 
 
 def _from_rgb_to_hsv(r, g, b):
@@ -258,25 +522,38 @@ def _from_rgb_to_hsv(r, g, b):
 
 
 def from_rgb_to_paletton_hue(r, g, b, color_wheel):
+    """
+    paletton hue of an rgb color on the color wheel, interpolated between
+    the hues of the two anchors around it. paletton.from_rgb_to_paletton_hue
+    looks the hue up among all 360 interpolated colors instead and may
+    differ by a hue or two between anchors
+    >>> from .constants import COLOR_WHEEL, COLOR_WHEEL_V3
+    >>> from_rgb_to_paletton_hue(0, 51, 204, COLOR_WHEEL)
+    240
+    >>> from_rgb_to_paletton_hue(0, 64, 255, COLOR_WHEEL_V3)
+    242
+    """
+
+    from bisect import bisect_left
     from colorsys import rgb_to_hsv
 
     h, s, v = rgb_to_hsv(r, g, b)
-    wheel_hues = tuple(
-        rgb_to_hsv(*color_wheel[k][:3])[0] for k in sorted(color_wheel.keys())
-    )
-    if h in wheel_hues:
-        paletton_hue = wheel_hues.index(h) * 15
+    wheel_hues, sorted_hues, positions = _anchor_hues(color_wheel)
+    if h in positions:
+        paletton_hue = positions[h] * 15
     else:
-        i = sorted(wheel_hues + (h,)).index(h)
+        i = bisect_left(sorted_hues, h)
         wheel_start = (i - 1) * 15
         wheel_end = i * 15 if i < len(wheel_hues) else 360
         h1 = wheel_hues[i-1]
         h2 = wheel_hues[i] if i < len(wheel_hues) else 1.
         k = (h - h1) / (h2 - h1)
-        log.debug(
-            "k=%s, h=%s, h1=%s, h2=%s, i1=%s, i2=%s",
-            k, h, h1, h2, wheel_start, wheel_end
-        )
+        if DEBUG:
+            import logging
+            logging.getLogger(__name__).debug(
+                "k=%s, h=%s, h1=%s, h2=%s, i1=%s, i2=%s",
+                k, h, h1, h2, wheel_start, wheel_end
+            )
         paletton_hue = round(
             wheel_start + k * (wheel_end - wheel_start)
         )
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+numpy batch counterparts of the scalar paletton functions
+
+numpy is an optional dependency, install it with
+``pip install color_scheme_generator[numpy]``
+"""
+
+import numpy as np
+
+from . import color_spaces
+
+
+def make_sv_variations_batch(rgb, preset):
+    """
+    array version of paletton.make_sv_variations
+    take (N, 3) rgb array and preset, return (N, len(preset), 2) array
+    of (saturation, value) pairs
+
+    >>> from .constants import PRESETS
+    >>> sv = make_sv_variations_batch([(179, 0, 0)], PRESETS['default'])
+    >>> sv.shape
+    (1, 4, 2)
+    >>> print(sv.round(2).tolist())
+    [[[1.0, 0.7], [1.0, 0.49], [0.25, 1.0], [0.5, 1.0]]]
+    """
+
+    rgb = np.asarray(rgb, dtype=np.float64) / 255
+    maxc = rgb.max(axis=-1)
+    minc = rgb.min(axis=-1)
+    # same operations as colorsys.rgb_to_hsv to keep results bit-identical
+    base_saturation = np.divide(
+        maxc - minc, maxc, out=np.zeros_like(maxc), where=maxc != minc)
+    base = np.stack((base_saturation, maxc), axis=-1)[:, np.newaxis, :]
+
+    ratios = np.asarray(preset, dtype=np.float64)[np.newaxis, :, :]
+    sv = np.where(ratios < 0, -ratios * base, ratios)
+    return np.clip(sv, 0, 1)
+
+
+def variations_batch(rgb, preset):
+    """
+    array version of paletton.variations_generator
+    take (N, 3) uint8 array of base colors and preset,
+    return (N, len(preset), 3) uint8 array of tones
+    rounding is the same as in the scalar generator
+
+    >>> from .constants import PRESETS_V3
+    >>> tones = variations_batch(
+    ...     [(255, 0, 0), (0, 204, 0)], PRESETS_V3['full_colors'])
+    >>> tones.shape
+    (2, 5, 3)
+    >>> print(tones[0].tolist())
+    [[255, 99, 99], [255, 57, 57], [255, 0, 0], [197, 0, 0], [155, 0, 0]]
+    """
+
+    rgb = np.asarray(rgb, dtype=np.uint8).reshape(-1, 3)
+    sv = make_sv_variations_batch(rgb, preset)
+    s, v = sv[..., :1], sv[..., 1:] * 255
+
+    colors = rgb.astype(np.float64)[:, np.newaxis, :]
+    max_rgb = colors.max(axis=-1, keepdims=True)
+    k = np.divide(v, max_rgb, out=np.zeros_like(v), where=max_rgb > 0)
+
+    tones = np.round(v - (v - colors * k) * s)
+    return np.clip(tones, 0, 255).astype(np.uint8)
+
+
+def rgb_to_hsv_hue_batch(rgb):
+    """
+    array version of colorsys.rgb_to_hsv(...)[0], bit-identical to it
+    take (N, 3) array, return (N,) array of hues, 0 <= hue < 1
+
+    >>> print(rgb_to_hsv_hue_batch([(255, 0, 0), (0, 0, 255), (5, 5, 5)]))
+    [0.         0.66666667 0.        ]
+    """
+
+    rgb = np.asarray(rgb, dtype=np.float64).reshape(-1, 3)
+    r, g, b = rgb.T
+    maxc = rgb.max(axis=-1)
+    rangec = maxc - rgb.min(axis=-1)
+    gray = rangec == 0
+    rangec = np.where(gray, 1, rangec)
+    rc, gc, bc = ((maxc - c) / rangec for c in (r, g, b))
+    hue = np.where(
+        r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    return np.where(gray, 0.0, (hue / 6.0) % 1.0)
+
+
+def from_rgb_to_paletton_hue_batch(rgb, hue_index):
+    """
+    array version of paletton.from_rgb_to_paletton_hue
+    take (N, 3) array of rgb and Paletton.HUE_INDEX,
+    return (N,) int array of paletton hues
+
+    >>> from .paletton import Paletton
+    >>> print(from_rgb_to_paletton_hue_batch(
+    ...     [(120, 0, 106), (255, 0, 0), (0, 0, 255)], Paletton().HUE_INDEX))
+    [318   0 255]
+    """
+
+    keys, values = (np.asarray(k, dtype=np.float64) for k in hue_index)
+    hue = rgb_to_hsv_hue_batch(rgb) * 360
+    i = np.searchsorted(keys, hue, side='left')
+    exact = keys[i] == hue
+    k1, k2, v1, v2 = keys[i-1], keys[i], values[i-1], values[i]
+    k = (hue - k1) / (k2 - k1)
+    result = np.where(exact, values[i], np.round(v1 + k * (v2 - v1)))
+    return result.astype(np.int64) % 360
+
+
+def _cubic(t, a, b):
+    weight = t * t * (3 - 2*t)
+    return a + weight * (b - a)
+
+
+def ryb_to_rgb_batch(ryb):
+    """
+    array version of utils.ryb_to_rgb, (N, 3) floats in [0, 1] -> (N, 3)
+    performs the same float operations, so results equal the scalar ones
+
+    >>> print(ryb_to_rgb_batch([(1, 0, 0), (0, 1, 1), (0, 0, 0)]).round(3))
+    [[1.   0.   0.  ]
+     [0.   0.66 0.2 ]
+     [1.   1.   1.  ]]
+    """
+
+    ryb = np.asarray(ryb, dtype=np.float64).reshape(-1, 3)
+    r, y, b = ryb.T
+
+    def channel(c00, c01, c10, c11, c20, c21, c30, c31):
+        x0, x1 = _cubic(b, c00, c01), _cubic(b, c10, c11)
+        x2, x3 = _cubic(b, c20, c21), _cubic(b, c30, c31)
+        y0, y1 = _cubic(y, x0, x1), _cubic(y, x2, x3)
+        return _cubic(r, y0, y1)
+
+    return np.stack((
+        channel(1.0, 0.163, 1.0, 0.0, 1.0, 0.5, 1.0, 0.2),
+        channel(1.0, 0.373, 1.0, 0.66, 0., 0., 0.5, 0.094),
+        channel(1.0, 0.6, 0.0, 0.2, 0.0, 0.5, 0.0, 0.0),
+    ), axis=-1)
+
+
+def ryb_to_rgb_nishita_batch(ryb):
+    """
+    array version of utils.ryb_to_rgb_nishita, (N, 3) -> (N, 3)
+    grays other than black and white, where the scalar version divides
+    by zero, come out as gray
+
+    >>> print(ryb_to_rgb_nishita_batch(
+    ...     [(1, 0, 0), (0, 1, 1), (0, 0, 0), (1, 1, 1), (.5, .5, .5)]))
+    [[1.  0.  0. ]
+     [0.  1.  0. ]
+     [1.  1.  1. ]
+     [0.  0.  0. ]
+     [0.5 0.5 0.5]]
+    """
+
+    ryb = np.asarray(ryb, dtype=np.float64).reshape(-1, 3)
+    low = ryb.min(axis=-1, keepdims=True)
+    high = ryb.max(axis=-1, keepdims=True)
+
+    # (5) take black component from each of RYB
+    r, y, b = (ryb - low).T
+    # (6) obtain rgb
+    yb = np.minimum(y, b)
+    rgb1 = np.stack((r + y - yb, y + 2*yb, 2*(b - yb)), axis=-1)
+    # (7) normalize rgb
+    n = rgb1.max(axis=-1, keepdims=True) / np.where(
+        high > low, high - low, 1)
+    rgb2 = np.divide(rgb1, n, out=np.zeros_like(rgb1), where=n > 0)
+    # (8) finally add white component
+    rgb = rgb2 + (1 - high)
+
+    rgb[high[:, 0] == 0] = 1
+    rgb[low[:, 0] == 1] = 0
+    return rgb
+
+
+_RYB_LATTICES = {}
+
+
+def ryb_lattice(resolution=33):
+    """
+    read-only (resolution, resolution, resolution, 3) grid of ryb_to_rgb
+    values, built once per resolution
+    """
+
+    lattice = _RYB_LATTICES.get(resolution)
+    if lattice is None:
+        axis = np.linspace(0, 1, resolution)
+        grid = np.stack(np.meshgrid(axis, axis, axis, indexing='ij'), -1)
+        lattice = ryb_to_rgb_batch(grid.reshape(-1, 3)).reshape(grid.shape)
+        lattice.flags.writeable = False
+        lattice = _RYB_LATTICES.setdefault(resolution, lattice)
+    return lattice
+
+
+def ryb_to_rgb_lattice(ryb, resolution=33):
+    """
+    approximate ryb_to_rgb_batch by trilinear interpolation in ryb_lattice
+
+    maximum absolute error against utils.ryb_to_rgb over 10**5 random
+    colors: 6.1e-3 at resolution 17, 1.6e-3 at 33, 4.0e-4 at 65,
+    i.e. below half of an 8-bit step (2e-3) from resolution 33 up.
+    lattice corners are exact
+
+    >>> print(ryb_to_rgb_lattice([(1, 0, 0), (0, 1, 1)]).round(3))
+    [[1.   0.   0.  ]
+     [0.   0.66 0.2 ]]
+    """
+
+    lattice = ryb_lattice(resolution)
+    x = np.clip(np.asarray(ryb, dtype=np.float64).reshape(-1, 3), 0, 1)
+    x = x * (resolution - 1)
+    i = np.minimum(x.astype(np.intp), resolution - 2)
+    f = x - i
+    ir, iy, ib = i.T
+    fr, fy, fb = (k[:, np.newaxis] for k in f.T)
+
+    def lerp(a, b, t):
+        return a + (b - a) * t
+
+    c = [lerp(lattice[ir + dr, iy + dy, ib],
+              lattice[ir + dr, iy + dy, ib + 1], fb)
+         for dr in (0, 1) for dy in (0, 1)]
+    return lerp(lerp(c[0], c[1], fy), lerp(c[2], c[3], fy), fr)
+
+
+_SRGB8_TO_LINEAR = np.array(color_spaces.SRGB8_TO_LINEAR)
+_SRGB_TO_XYZ = np.array(color_spaces.SRGB_TO_XYZ)
+_XYZ_TO_SRGB = np.array(color_spaces.XYZ_TO_SRGB)
+_LINEAR_TO_LMS = np.array(color_spaces.LINEAR_TO_LMS)
+_LMS_TO_LINEAR = np.array(color_spaces.LMS_TO_LINEAR)
+_LMS_TO_OKLAB = np.array(color_spaces.LMS_TO_OKLAB)
+_OKLAB_TO_LMS = np.array(color_spaces.OKLAB_TO_LMS)
+_WHITE_D65 = np.array(color_spaces.WHITE_D65)
+
+
+def srgb_to_linear_batch(rgb):
+    """
+    array version of color_spaces.srgb_to_linear for (..., 3) arrays
+    uint8 arrays are 8-bit channel values looked up in SRGB8_TO_LINEAR,
+    anything else is taken as floats 0..1
+
+    >>> print(srgb_to_linear_batch(np.array([[255, 0, 128]], np.uint8)))
+    [[1.        0.        0.2158605]]
+    >>> print(srgb_to_linear_batch([[1, 0, 128 / 255]]))
+    [[1.        0.        0.2158605]]
+    """
+
+    rgb = np.asarray(rgb)
+    if rgb.dtype == np.uint8:
+        return _SRGB8_TO_LINEAR[rgb]
+    rgb = rgb.astype(np.float64)
+    # clamp the power branch input so that it never sees negatives
+    return np.where(rgb <= 0.04045, rgb / 12.92,
+                    ((np.maximum(rgb, 0.04045) + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb_batch(linear):
+    linear = np.asarray(linear, dtype=np.float64)
+    return np.where(linear <= 0.0031308, linear * 12.92,
+                    1.055 * np.maximum(linear, 0.0031308) ** (1 / 2.4) - 0.055)
+
+
+def rgb_to_xyz_batch(rgb):
+    return srgb_to_linear_batch(rgb) @ _SRGB_TO_XYZ.T
+
+
+def xyz_to_rgb_batch(xyz):
+    return linear_to_srgb_batch(np.asarray(xyz) @ _XYZ_TO_SRGB.T)
+
+
+def rgb_to_lab_batch(rgb):
+    """
+    array version of color_spaces.rgb_to_lab, (..., 3) -> (..., 3)
+    >>> print(rgb_to_lab_batch(np.array([[255, 255, 255], [255, 0, 0]],
+    ...                                 np.uint8)).round(2) + 0)
+    [[100.     0.     0.  ]
+     [ 53.24  80.09  67.2 ]]
+    """
+
+    t = rgb_to_xyz_batch(rgb) / _WHITE_D65
+    f = np.where(t > color_spaces.LAB_EPSILON,
+                 np.cbrt(t), t / color_spaces.LAB_KAPPA + 4 / 29)
+    fx, fy, fz = np.moveaxis(f, -1, 0)
+    return np.stack((116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)), -1)
+
+
+def lab_to_rgb_batch(lab):
+    lightness, a, b = np.moveaxis(np.asarray(lab, dtype=np.float64), -1, 0)
+    fy = (lightness + 16) / 116
+    f = np.stack((fy + a / 500, fy, fy - b / 200), -1)
+    t = np.where(f > 6 / 29, f ** 3, color_spaces.LAB_KAPPA * (f - 4 / 29))
+    return xyz_to_rgb_batch(t * _WHITE_D65)
+
+
+def rgb_to_oklab_batch(rgb):
+    """
+    array version of color_spaces.rgb_to_oklab, (..., 3) -> (..., 3)
+    >>> print(rgb_to_oklab_batch([[1, 0, 0]]).round(4))
+    [[0.628  0.2249 0.1258]]
+    """
+
+    lms = srgb_to_linear_batch(rgb) @ _LINEAR_TO_LMS.T
+    return np.cbrt(lms) @ _LMS_TO_OKLAB.T
+
+
+def oklab_to_rgb_batch(lab):
+    lms = (np.asarray(lab, dtype=np.float64) @ _OKLAB_TO_LMS.T) ** 3
+    return linear_to_srgb_batch(lms @ _LMS_TO_LINEAR.T)
+
+
+_LUMINANCE8 = np.array(color_spaces.LUMINANCE8)
+
+
+def relative_luminance_batch(rgb):
+    """
+    WCAG relative luminance of (..., 3) uint8 rgb, or of 0xRRGGBB packed
+    integers when rgb is an integer array without a trailing axis of 3
+
+    >>> print(relative_luminance_batch(np.array([[255, 255, 255], [255, 0, 0]],
+    ...                                         np.uint8)))
+    [1.     0.2126]
+    >>> print(relative_luminance_batch(np.array([0xFFFFFF, 0xFF0000])))
+    [1.     0.2126]
+    """
+
+    rgb = np.asarray(rgb)
+    if rgb.shape[-1:] != (3,):
+        rgb = np.stack(((rgb >> 16) & 0xFF, (rgb >> 8) & 0xFF, rgb & 0xFF),
+                       axis=-1)
+    return (_LUMINANCE8[0][rgb[..., 0]] + _LUMINANCE8[1][rgb[..., 1]] +
+            _LUMINANCE8[2][rgb[..., 2]])
+
+
+def contrast_matrix_batch(luminance):
+    """
+    WCAG contrast ratios of all pairs, (..., n) luminances -> (..., n, n)
+    >>> print(contrast_matrix_batch([0., 1.]))
+    [[ 1. 21.]
+     [21.  1.]]
+    """
+
+    luminance = np.asarray(luminance, dtype=np.float64)
+    rows = luminance[..., :, np.newaxis]
+    columns = luminance[..., np.newaxis, :]
+    return (np.maximum(rows, columns) + 0.05) / (
+        np.minimum(rows, columns) + 0.05)
+
+
+def black_white_contrast_batch(luminance):
+    """
+    WCAG contrast ratios against black and white, (..., n) -> (..., n, 2)
+    """
+
+    luminance = np.asarray(luminance, dtype=np.float64)
+    return np.stack(((luminance + 0.05) / 0.05, 1.05 / (luminance + 0.05)),
+                    axis=-1)
+
+
+def max_contrast_batch(luminance):
+    """
+    highest contrast ratio between any two of (..., n) luminances,
+    from the extremes only, no matrix is built
+    >>> print(max_contrast_batch([[0., .5, 1.], [.2, .2, .3]]).round(3))
+    [21.   1.4]
+    """
+
+    luminance = np.asarray(luminance, dtype=np.float64)
+    return (luminance.max(axis=-1) + 0.05) / (luminance.min(axis=-1) + 0.05)
@@ -14,6 +14,10 @@ requirements = [
     # TODO: put package requirements here
 ]
 
+extras_requirements = {
+    'numpy': ['numpy'],
+}
+
 test_requirements = [
     # TODO: put package test requirements here
 ]
@@ -38,6 +42,8 @@ setup(
     },
     include_package_data=True,
     install_requires=requirements,
+    extras_require=extras_requirements,
+    python_requires='>=3.8',
     license="MIT license",
     zip_safe=False,
     keywords='color_scheme_generator',
@@ -46,13 +52,12 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
         'Natural Language :: English',
-        "Programming Language :: Python :: 2",
-        'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
     ],
     test_suite='tests',
     tests_require=test_requirements
@@ -9,7 +9,11 @@ Tests for `color_scheme_generator` module.
 """
 
 
+import json
+import os
+import subprocess
 import sys
+import tempfile
 import unittest
 import doctest
 from contextlib import contextmanager
@@ -19,15 +23,91 @@ from color_scheme_generator import color_scheme_generator
 from color_scheme_generator import cli
 from color_scheme_generator import utils
 from color_scheme_generator import paletton
+from color_scheme_generator import parallel
+from color_scheme_generator import disk_cache
+from color_scheme_generator import service
+from color_scheme_generator import color_spaces
+from color_scheme_generator import catalog
+from color_scheme_generator import image
+from color_scheme_generator import instrument
+from color_scheme_generator import fixed_point
+from color_scheme_generator.constants import (
+    PRESETS, PRESETS_V3, COLOR_WHEEL_V3)
+
+try:
+    import numpy
+    from color_scheme_generator import vectorized
+except ImportError:
+    numpy = None
 
 
 def load_tests(loader, tests, ignore):
     tests.addTests(doctest.DocTestSuite(utils))
     tests.addTests(doctest.DocTestSuite(color_scheme_generator))
     tests.addTests(doctest.DocTestSuite(paletton))
+    tests.addTests(doctest.DocTestSuite(parallel))
+    tests.addTests(doctest.DocTestSuite(disk_cache))
+    tests.addTests(doctest.DocTestSuite(service))
+    tests.addTests(doctest.DocTestSuite(color_spaces))
+    tests.addTests(doctest.DocTestSuite(catalog))
+    tests.addTests(doctest.DocTestSuite(image))
+    tests.addTests(doctest.DocTestSuite(instrument))
+    tests.addTests(doctest.DocTestSuite(fixed_point))
+    if numpy is not None:
+        tests.addTests(doctest.DocTestSuite(vectorized))
     return tests
 
 
+def reference_tones(hue, color_wheel, preset):
+    """
+    tone rows of a value wheel the way utils computed them before the
+    normalized wheel engine, the reference of the value wheel tests
+    """
+
+    def avrg(a, b, k):
+        return a + round((b - a) * k)
+
+    def calc(x, base_data):
+        x = -x * base_data if x < 0 else x
+        return 1 if x > 1 else 0 if x < 0 else x
+
+    hue = round(hue % 360)
+    d = hue % 15
+    k = d / 15.
+    colorset1 = color_wheel[hue - d]
+    colorset2 = color_wheel[(hue - d + 15) % 360]
+    rgbv = tuple(avrg(c1, c2, k) for c1, c2 in zip(colorset1, colorset2))
+    max_rgb = max(rgbv[:3])
+    tones = []
+    for s, v in preset:
+        s, v = calc(s, 1.), calc(v, rgbv[-1] / 100) * 255
+        k = v / max_rgb if max_rgb > 0 else 0
+        tones.append(tuple(min(255, round(v - (v - color * k) * s))
+                           for color in rgbv[:3]))
+    return tuple(tones)
+
+
+def reference_hue(r, g, b, color_wheel):
+    """
+    paletton hue of an rgb color the way utils computed it before the
+    normalized wheel engine, interpolated between the anchor hues
+    """
+
+    from colorsys import rgb_to_hsv
+    h = rgb_to_hsv(r, g, b)[0]
+    wheel_hues = tuple(
+        rgb_to_hsv(*color_wheel[k][:3])[0] for k in sorted(color_wheel))
+    if h in wheel_hues:
+        return wheel_hues.index(h) * 15
+    i = sorted(wheel_hues + (h,)).index(h)
+    wheel_start = (i - 1) * 15
+    wheel_end = i * 15 if i < len(wheel_hues) else 360
+    h1 = wheel_hues[i-1]
+    h2 = wheel_hues[i] if i < len(wheel_hues) else 1.
+    k = (h - h1) / (h2 - h1)
+    return round(wheel_start + k * (wheel_end - wheel_start)) % 360
+
+
 class TestColor_scheme_generator(unittest.TestCase):
 
     def setUp(self):
@@ -39,15 +119,761 @@ class TestColor_scheme_generator(unittest.TestCase):
     def test_000_something(self):
         pass
 
+    def test_import_time(self):
+        # cumulative time of the top level package imports, dependencies
+        # included, best of three runs. a first run writes the bytecode,
+        # so that compiling is not timed. warm runs take 55-90 ms here
+        budget_us = 150000
+        command = [sys.executable, '-X', 'importtime', '-c',
+                   'import color_scheme_generator.cli, '
+                   'color_scheme_generator.color_scheme_generator']
+        cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run(command, cwd=cwd, stderr=subprocess.DEVNULL,
+                       check=True)
+        totals = []
+        for _ in range(3):
+            result = subprocess.run(
+                command, cwd=cwd, stderr=subprocess.PIPE,
+                universal_newlines=True, check=True)
+            modules = {}
+            for line in result.stderr.splitlines():
+                if not line.startswith('import time:') or 'self' in line:
+                    continue
+                _, cumulative_us, name = line[len('import time:'):].split(
+                    '|')
+                modules[name.rstrip()] = int(cumulative_us)
+            totals.append(sum(
+                us for name, us in modules.items()
+                if name.startswith(' color_scheme_generator')))
+            self.assertIn(' color_scheme_generator.cli', modules)
+            self.assertNotIn('numpy', {name.strip() for name in modules})
+            self.assertNotIn('logging', {name.strip() for name in modules})
+        self.assertLess(min(totals), budget_us, totals)
+
     def test_command_line_interface(self):
         runner = CliRunner()
-        result = runner.invoke(cli.main)
-        assert result.exit_code == 0
-        assert 'color_scheme_generator.cli.main' in result.output
         help_result = runner.invoke(cli.main, ['--help'])
         assert help_result.exit_code == 0
         assert '--help  Show this message and exit.' in help_result.output
 
+    def test_generate_json(self):
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ['generate', '--preset', 'full_colors'],
+            input='#FF0000\n\nnot a color\n#00cc00\n')
+        assert result.exit_code == 0
+        records = [json.loads(line) for line in
+                   result.output.splitlines() if line.startswith('{')]
+        self.assertEqual([r['color'] for r in records], ['#FF0000', '#00cc00'])
+        self.assertEqual(records[0]['palette'], [
+            ['#FF6363', '#FF3939', '#FF0000', '#C50000', '#9B0000']])
+
+    def test_generate_skips_invalid_colors(self):
+        invalid = ['0x1', '-ab', '+abcde', '#0x1', '1_2', ' ab c',
+                   '#12', '#1234567', '١٢٣', 'abg']
+        valid = ['abc', '#ABCDEF', '#0a0B0c']
+        self.assertEqual(list(cli.read_colors(invalid + valid)), valid)
+
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ['generate', '--format', 'csv'],
+            input='\n'.join(invalid + valid) + '\n')
+        self.assertEqual(result.exit_code, 0, result.output)
+        rows = [line.split(',')[0] for line in result.output.splitlines()
+                if not line.startswith('line ')]
+        self.assertEqual(rows, valid)
+        for line_number, color in enumerate(invalid, 1):
+            self.assertIn(
+                "line %d: skipping %r" % (line_number, color.strip()),
+                result.output)
+
+    def test_generate_csv(self):
+        runner = CliRunner()
+        result = runner.invoke(
+            cli.main, ['generate', '--engine', 'hsv', '--format', 'csv'],
+            input='#FF0000\n')
+        assert result.exit_code == 0
+        self.assertEqual(
+            result.output,
+            '#FF0000,#FFAAAA,#D46A6A,#A83939,#801616,#540000\n')
+
+    def test_schemes(self):
+        from color_scheme_generator.constants import SCHEMES
+        p = paletton.Paletton()
+        base = color_scheme_generator.Color(hex='#FF0000')
+        for name, offsets in SCHEMES.items():
+            rows = p.scheme(0, name, 'pastel')
+            self.assertEqual(len(rows), len(offsets))
+            palette = color_scheme_generator.generate_palette(
+                base, name, 'pastel')
+            self.assertEqual(
+                list(palette.hex_values()),
+                [tuple(tone.hex for tone in tones) for tones in rows])
+        free_style = color_scheme_generator.generate_from_scheme(
+            base, (0, 90, 270))
+        self.assertEqual(len(list(free_style)), 3)
+
+    def test_color_array(self):
+        from random import Random
+        Color = color_scheme_generator.Color
+        rnd = Random(5)
+        colors = [Color(hex='#%06X' % rnd.randrange(1 << 24))
+                  for _ in range(2000)]
+        array = color_scheme_generator.ColorArray(colors)
+        self.assertEqual(len(array), len(colors))
+        self.assertEqual(array.nbytes(), 3 * 8 * len(colors))
+        for color, stored in zip(colors, array):
+            self.assertEqual(stored.hsv, color.hsv)
+            self.assertEqual(stored.rgb, color.rgb)
+            self.assertEqual(stored.hex, color.hex)
+        self.assertEqual(array[-1].hsv, colors[-1].hsv)
+        with self.assertRaises(IndexError):
+            array[len(colors)]
+
+        # views are computed once and shared by the Colors made later
+        hex_values = array.hex
+        self.assertIs(array.hex, hex_values)
+        self.assertEqual(hex_values, tuple(color.hex for color in colors))
+        self.assertIs(array[7].hex, hex_values[7])
+        self.assertIs(next(iter(array)).hex, hex_values[0])
+        rgb = array.rgb
+        self.assertEqual(rgb, tuple(color.rgb for color in colors))
+        self.assertIs(array[7].rgb, rgb[7])
+        array.append(Color(hex='#123456'))
+        self.assertEqual(array.hex[-1], '#123456')
+        self.assertEqual(len(array.rgb), len(colors) + 1)
+
+        compact = color_scheme_generator.ColorArray(colors, 'f')
+        self.assertEqual(compact.nbytes(), 3 * 4 * len(colors))
+
+    def test_palette_buffer(self):
+        palette = color_scheme_generator.generate_palette(
+            color_scheme_generator.Color(hex='#FF5858'), 'triad')
+        view = palette.buffer()
+        self.assertEqual(view.format, 'I')
+        self.assertEqual(
+            ['#%06X' % k for k in view],
+            [tone for tones in palette.hex_values() for tone in tones])
+        # memoryview(palette) needs the buffer protocol of Python 3.12
+        if sys.version_info >= (3, 12):
+            self.assertEqual(memoryview(palette).tolist(), view.tolist())
+        else:
+            with self.assertRaises(TypeError):
+                memoryview(palette)
+
+    def test_color_wheel_incremental(self):
+        from random import Random
+        rnd = Random(0)
+        wheel = paletton.ColorWheel()
+        p = paletton.Paletton(COLOR_WHEEL=wheel)
+        table = p.tone_table('pastel')
+        list(table)
+        for _ in range(30):
+            key = rnd.randrange(0, 360, 15)
+            old = dict(p.EXPANDED_COLOR_WHEEL)
+            changed = wheel.set_anchor(
+                key, tuple(rnd.randrange(256) for _ in range(3)))
+            self.assertLessEqual(
+                changed, {h % 360 for h in range(key - 15, key + 15)})
+            self.assertEqual(
+                changed, {h for h in old if old[h] != wheel.expanded[h]})
+            cached = [h for h in range(360) if list.__getitem__(table, h)]
+            self.assertEqual(set(range(360)) - set(cached), changed)
+
+            fresh = paletton.Paletton(COLOR_WHEEL=dict(wheel))
+            self.assertEqual(p.EXPANDED_COLOR_WHEEL,
+                             fresh.EXPANDED_COLOR_WHEEL)
+            self.assertEqual(p.HUE_OFFSETS, fresh.HUE_OFFSETS)
+            self.assertEqual(tuple(map(tuple, p.HUE_INDEX)), fresh.HUE_INDEX)
+            self.assertEqual(tuple(p.WHEEL_HUES), fresh.WHEEL_HUES)
+            self.assertEqual(tuple(table), fresh.tone_table('pastel'))
+
+    def test_color_wheel_formats(self):
+        from random import Random
+        from color_scheme_generator.constants import COLOR_WHEEL
+        rnd = Random(1)
+        colors = [(20, 40, 200)] + [
+            tuple(rnd.randrange(256) for _ in range(3)) for _ in range(200)]
+        for color_wheel, presets in ((COLOR_WHEEL, PRESETS),
+                                     (COLOR_WHEEL_V3, PRESETS_V3)):
+            wheel = paletton.ColorWheel(color_wheel)
+            p = paletton.Paletton(COLOR_WHEEL=wheel, PRESETS=presets)
+            for step in range(6):
+                fresh = paletton.Paletton(COLOR_WHEEL=dict(wheel),
+                                          PRESETS=presets)
+                self.assertEqual(p.EXPANDED_COLOR_WHEEL,
+                                 fresh.EXPANDED_COLOR_WHEEL)
+                self.assertEqual(p.HUE_OFFSETS, fresh.HUE_OFFSETS)
+                self.assertEqual(tuple(p.WHEEL_HUES), fresh.WHEEL_HUES)
+                for name in presets:
+                    self.assertEqual(tuple(p.tone_table(name)),
+                                     fresh.tone_table(name))
+                self.assertEqual(
+                    [paletton.from_rgb_to_paletton_hue(rgb, p)
+                     for rgb in colors],
+                    [paletton.from_rgb_to_paletton_hue(rgb, fresh)
+                     for rgb in colors])
+                key = rnd.randrange(0, 360, 15)
+                anchor = [rnd.randrange(256) for _ in range(3)]
+                if len(color_wheel[0]) == 4:
+                    anchor.append(rnd.randrange(40, 101))
+                wheel.set_anchor(key, tuple(anchor))
+
+        wheel = paletton.ColorWheel(COLOR_WHEEL)
+        p = paletton.Paletton(COLOR_WHEEL=wheel, PRESETS=PRESETS)
+        self.assertEqual(len(p.HUE_OFFSETS), len(COLOR_WHEEL))
+        self.assertEqual(p.tones(250, 'default')[0].hex, '#1122BA')
+        self.assertEqual(
+            paletton.from_rgb_to_paletton_hue((20, 40, 200), p), 248)
+        with self.assertRaises(ValueError):
+            wheel.set_anchor(15, (255, 60, 0))
+
+    def test_paletton_shares_wheel_tables(self):
+        from concurrent.futures import ThreadPoolExecutor
+        wheel = dict(COLOR_WHEEL_V3)
+        wheel[0] = (254, 0, 0)
+        with ThreadPoolExecutor(4) as executor:
+            palettons = list(executor.map(
+                lambda _: paletton.Paletton(COLOR_WHEEL=dict(wheel)),
+                range(16)))
+        for p in palettons:
+            self.assertIs(p.EXPANDED_COLOR_WHEEL,
+                          palettons[0].EXPANDED_COLOR_WHEEL)
+            self.assertIs(p.HUE_INDEX, palettons[0].HUE_INDEX)
+        with self.assertRaises(TypeError):
+            palettons[0].HUE_OFFSETS[0] = 1
+        self.assertGreater(
+            paletton.wheel_cache_info()['wheel_tables']['hits'], 0)
+
+    def test_sweep(self):
+        from color_scheme_generator.constants import COLOR_WHEEL
+
+        for name, preset in list(PRESETS.items()) + list(PRESETS_V3.items()):
+            for start, stop, step in ((0, 360, 1), (0, 359, .7),
+                                      (350, 10, -1), (17, 17, 1)):
+                hues = [hue for hue, _ in utils.iter_sweep(
+                    start, stop, step, name)]
+                self.assertEqual(hues, [start + i * step
+                                        for i in range(len(hues))])
+                rows = [reference_tones(hue, COLOR_WHEEL, preset)
+                        for hue in hues]
+                self.assertEqual(
+                    [row for _, row in utils.iter_sweep(
+                        start, stop, step, preset)], rows)
+                self.assertEqual(
+                    utils.sweep(start, stop, step, name).tobytes(),
+                    bytes(k for row in rows for rgb in row for k in rgb))
+        with self.assertRaises(ValueError):
+            utils.sweep(0, 10, 0)
+
+    def test_instrument(self):
+        originals = (color_scheme_generator.generate_from_scheme,
+                     vars(color_scheme_generator.Color)['rgb'],
+                     paletton.lookup_paletton_hue)
+        wheel = dict(COLOR_WHEEL_V3)
+        wheel[0] = (253, 0, 0)
+        with instrument.instrumented() as stats:
+            with instrument.instrumented(reset=False):
+                p = paletton.Paletton(COLOR_WHEEL=wheel)
+            self.assertTrue(instrument.is_enabled())
+            palette = color_scheme_generator.generate_palette(
+                color_scheme_generator.Color(hex='#3366CC'), 'tetrad')
+            self.assertEqual(len(list(palette.hex_values())), 4)
+            self.assertEqual(
+                paletton.from_rgb_to_paletton_hue((0, 0, 255), p), 255)
+        self.assertFalse(instrument.is_enabled())
+        self.assertEqual(
+            (color_scheme_generator.generate_from_scheme,
+             vars(color_scheme_generator.Color)['rgb'],
+             paletton.lookup_paletton_hue), originals)
+
+        snapshot = stats.snapshot()
+        self.assertEqual(json.loads(stats.to_json()), snapshot)
+        self.assertEqual(snapshot['expand_color_wheel']['calls'], 1)
+        self.assertEqual(snapshot['generate_from_scheme']['calls'], 1)
+        self.assertEqual(snapshot['generate_from_preset']['calls'], 4)
+        self.assertEqual(snapshot['hue_lookup']['calls'], 2)
+        self.assertEqual(snapshot['Color.rgb']['calls'], 20)
+        for stage in ('generate_from_scheme', 'generate_from_preset',
+                      'Color.rgb', 'hue_lookup'):
+            self.assertGreater(snapshot[stage]['total_ns'], 0)
+
+        # counters stop with the block
+        color_scheme_generator.generate_palette(
+            color_scheme_generator.Color()).buffer()
+        self.assertEqual(instrument.snapshot(), snapshot)
+
+        # direct calls of the module level helper count as well
+        with instrument.instrumented() as stats:
+            paletton.expand_color_wheel(wheel)
+        self.assertEqual(stats.snapshot()['expand_color_wheel']['calls'], 1)
+
+    def test_utils_paletton_hue(self):
+        # the utils api keeps interpolating between anchors, the paletton
+        # one looks hues up among the 360 interpolated colors
+        from color_scheme_generator.constants import COLOR_WHEEL
+        from random import Random
+        rnd = Random(24)
+        colors = [tuple(rnd.randrange(256) for _ in range(3))
+                  for _ in range(2000)]
+        for color_wheel in (COLOR_WHEEL, COLOR_WHEEL_V3):
+            self.assertEqual(
+                [utils.from_rgb_to_paletton_hue(*rgb, color_wheel)
+                 for rgb in colors],
+                [reference_hue(*rgb, color_wheel) for rgb in colors])
+        p = paletton.Paletton(COLOR_WHEEL=COLOR_WHEEL_V3)
+        self.assertEqual(utils.from_rgb_to_paletton_hue(0, 64, 255,
+                                                        COLOR_WHEEL_V3), 242)
+        self.assertEqual(paletton.from_rgb_to_paletton_hue((0, 64, 255), p),
+                         243)
+
+        # the wheel is compared, not identified, changes are picked up
+        wheel = {k: list(v) for k, v in COLOR_WHEEL_V3.items()}
+        self.assertEqual(utils.from_rgb_to_paletton_hue(0, 64, 255, wheel),
+                         242)
+        wheel[240][:] = 0, 64, 255
+        self.assertEqual(utils.from_rgb_to_paletton_hue(0, 64, 255, wheel),
+                         240)
+
+    def test_paletton_value_wheel(self):
+        from color_scheme_generator.constants import COLOR_WHEEL
+        from random import Random
+        rnd = Random(23)
+        random_wheel = {
+            k: [rnd.randrange(256) for _ in range(3)]
+            + [rnd.randrange(30, 101)] for k in range(0, 360, 15)}
+        for color_wheel in (COLOR_WHEEL, random_wheel):
+            p = paletton.Paletton(COLOR_WHEEL=color_wheel, PRESETS=PRESETS)
+            for name, preset in PRESETS.items():
+                rows = [reference_tones(hue, color_wheel, preset)
+                        for hue in range(360)]
+                self.assertEqual(
+                    [tuple(tone.rgb for tone in p.tones(hue, name))
+                     for hue in range(360)], rows)
+                self.assertEqual(
+                    list(utils.sweep_table(color_wheel, preset)), rows)
+        self.assertEqual(
+            reference_tones(250, COLOR_WHEEL, PRESETS['default'])[0],
+            (17, 34, 186))
+        p = paletton.Paletton(COLOR_WHEEL=COLOR_WHEEL, PRESETS=PRESETS)
+        for hue in range(0, 360, 15):
+            rgb = tuple(COLOR_WHEEL[hue][:3])
+            self.assertEqual(paletton.from_rgb_to_paletton_hue(rgb, p), hue)
+            self.assertEqual(
+                utils.from_rgb_to_paletton_hue(*rgb, COLOR_WHEEL), hue)
+
+        wheel = {k: list(v) for k, v in COLOR_WHEEL.items()}
+        self.assertEqual(utils.from_paletton_hue_to_rgbvs(0, wheel),
+                         (255, 0, 0, 1., 1.))
+        wheel[0][1] = 30
+        self.assertEqual(utils.from_paletton_hue_to_rgbvs(0, wheel),
+                         (255, 30, 0, 1., 1.))
+
+    def test_fixed_point(self):
+        import random
+        from color_scheme_generator.constants import COLOR_WHEEL
+        random.seed(25)
+        colors = [tuple(random.randrange(256) for _ in range(3))
+                  for _ in range(500)] + [(0, 0, 0), (255, 255, 255)]
+        try:
+            for wheel in (COLOR_WHEEL, COLOR_WHEEL_V3):
+                tables = paletton.wheel_tables(wheel)
+                self.assertIsNotNone(tables.exact_base)
+                for preset in list(PRESETS.values()) + list(
+                        PRESETS_V3.values()):
+                    paletton.FIXED_POINT = True
+                    fixed = list(paletton.wheel_tones(tables, preset))
+                    fixed_rows = [paletton.make_tones(rgb, preset)
+                                  for rgb in colors]
+                    paletton.FIXED_POINT = False
+                    self.assertEqual(
+                        fixed, list(paletton.wheel_tones(tables, preset)))
+                    self.assertEqual(fixed_rows, [
+                        paletton.make_tones(rgb, preset) for rgb in colors])
+        finally:
+            paletton.FIXED_POINT = True
+        for start, stop in ((0, 255), (255, 0), (17, 200), (90, 90)):
+            self.assertEqual(
+                fixed_point.interpolate(start, stop, 15),
+                [round(k) for k in paletton.linspace(
+                    start, stop, 15, endpoint=False)])
+
+    def test_generate_palettes_workers(self):
+        colors = ['#%06X' % (k * 65537 % 0xFFFFFF) for k in range(500)]
+        for engine in ('paletton', 'hsv'):
+            serial = list(parallel.generate_palettes(
+                colors, engine=engine, chunksize=64))
+            stats = {}
+            pooled = list(parallel.generate_palettes(
+                colors, workers=2, chunksize=64, engine=engine, stats=stats))
+            self.assertEqual(pooled, serial)
+            self.assertEqual([color for color, _ in pooled], colors)
+            self.assertEqual(stats['count'], len(colors))
+
+    def test_disk_cache(self):
+        colors = ['#%06X' % (k * 65537 % 0xFFFFFF) for k in range(300)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'palettes.sqlite')
+            result = CliRunner().invoke(
+                cli.main, ['warm-cache', path, '--preset', 'pastel'])
+            self.assertEqual(result.exit_code, 0, result.output)
+            for engine in ('paletton', 'hsv'):
+                expected = list(parallel.generate_palettes(
+                    colors, engine=engine))
+                for _ in range(2):
+                    with disk_cache.PaletteCache(path, batch_size=64) as cache:
+                        cached = list(parallel.generate_palettes(
+                            colors, chunksize=64, engine=engine, cache=cache))
+                    self.assertEqual(cached, expected)
+            with disk_cache.PaletteCache(path) as cache:
+                self.assertEqual(
+                    len(cache), len(disk_cache.SCHEMES) * 360 + len(colors))
+            # another wheel does not see the stored palettes and evicts
+            # them before its own
+            wheel = dict(COLOR_WHEEL_V3)
+            wheel[0] = (254, 0, 0)
+            with disk_cache.PaletteCache(
+                    path, max_entries=10, color_wheel=wheel) as cache:
+                self.assertEqual(len(cache), 0)
+                cache.put('key', (('#000000',),))
+            with disk_cache.PaletteCache(path) as cache:
+                self.assertEqual(len(cache), 9)
+
+    def test_disk_cache_color_wheel(self):
+        # palettes are generated from the wheel of the cache, in the
+        # process and in the workers
+        from color_scheme_generator.constants import COLOR_WHEEL
+        colors = ['#%06X' % (k * 65537 % 0xFFFFFF) for k in range(50)]
+        p = paletton.Paletton(COLOR_WHEEL=COLOR_WHEEL)
+        expected = []
+        for color in colors:
+            hue = paletton.from_rgb_to_paletton_hue(
+                tuple(bytes.fromhex(color[1:])), p)
+            expected.append((color, tuple(
+                tuple(tone.hex for tone in tones)
+                for tones in p.scheme(hue, 'triad', 'pastel'))))
+        self.assertNotEqual(
+            expected, list(parallel.generate_palettes(colors, scheme='triad')))
+        for workers in (1, 2):
+            with disk_cache.PaletteCache(
+                    ':memory:', color_wheel=COLOR_WHEEL) as cache:
+                self.assertEqual(list(parallel.generate_palettes(
+                    colors, workers, chunksize=16, scheme='triad',
+                    cache=cache)), expected)
+                self.assertEqual(list(parallel.generate_palettes(
+                    colors, scheme='triad', cache=cache)), expected)
+        with disk_cache.PaletteCache(
+                ':memory:', color_wheel=COLOR_WHEEL) as cache:
+            disk_cache.warm_cache(cache, ('pastel',), ('mono',))
+            self.assertEqual(
+                cache.get(disk_cache.palette_key(0)),
+                tuple(tuple(tone.hex for tone in tones)
+                      for tones in p.scheme(0, 'mono', 'pastel')))
+
+    def test_disk_cache_row_count(self):
+        def rows(cache):
+            return cache._db.execute(
+                "SELECT COUNT(*) FROM palettes").fetchone()[0]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'palettes.sqlite')
+            with disk_cache.PaletteCache(
+                    path, max_entries=20, batch_size=4) as cache:
+                for k in range(30):
+                    cache.put('key%d' % (k % 12), (('#%06X' % k,),))
+                cache.flush()
+                self.assertEqual((cache._rows, rows(cache)), (12, 12))
+                cache.put_many(('new%d' % k, (('#000000',),))
+                               for k in range(10))
+                cache.flush()
+                self.assertEqual((cache._rows, rows(cache)), (20, 20))
+                self.assertEqual(cache.get('key11'), (('#000017',),))
+                self.assertIsNone(cache.get('key6'))
+            with disk_cache.PaletteCache(path, max_entries=20) as cache:
+                self.assertEqual(cache._rows, 20)
+
+    def test_generate_cache_closed_on_error(self):
+        from unittest import mock
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'palettes.sqlite')
+            with mock.patch('json.dumps', side_effect=RuntimeError):
+                result = CliRunner().invoke(
+                    cli.main, ['generate', '--cache', path],
+                    input='#FF0000\n#00FF00\n')
+            self.assertIsInstance(result.exception, RuntimeError)
+            with disk_cache.PaletteCache(path) as cache:
+                self.assertEqual(len(cache), 1)
+
+    def test_cache_namespace_tones(self):
+        from unittest import mock
+        namespace = disk_cache.cache_namespace()
+        try:
+            paletton.FIXED_POINT = False
+            paletton._TONE_CACHE.clear()
+            self.assertEqual(disk_cache.cache_namespace(), namespace)
+        finally:
+            paletton.FIXED_POINT = True
+        # a change of the tone arithmetic gives a new namespace
+        rgb_tones = paletton.rgb_tones
+        with mock.patch.object(paletton, 'rgb_tones', lambda rgb, sv: tuple(
+                tuple(min(255, k + 1) for k in tone)
+                for tone in rgb_tones(rgb, sv))):
+            paletton._TONE_CACHE.clear()
+            self.assertNotEqual(disk_cache.cache_namespace(), namespace)
+        paletton._TONE_CACHE.clear()
+        with mock.patch.object(disk_cache, '__version__', '0.0.0'):
+            self.assertNotEqual(disk_cache.cache_namespace(), namespace)
+
+    def test_service(self):
+        import asyncio
+        colors = ['#%06X' % (k * 65537 % 0xFFFFFF) for k in range(300)]
+        expected = dict(parallel.generate_palettes(
+            colors + ['#FF0000'], scheme='triad'))
+
+        async def get(port, target):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET %s HTTP/1.1\r\n\r\n' % target.encode())
+            status = int((await reader.readline()).split()[1])
+            body = (await reader.read()).split(b'\r\n\r\n', 1)[1]
+            writer.close()
+            return status, json.loads(body)
+
+        async def run():
+            palettes = service.PaletteService(max_batch=64, max_pending=100)
+            results = await asyncio.gather(*(
+                palettes.palette(color, 'triad') for color in colors))
+            self.assertEqual(results, [expected[c] for c in colors])
+            metrics = palettes.metrics()
+            self.assertEqual(metrics['requests'], len(colors))
+            self.assertLess(metrics['batches'], len(colors) // 20)
+            self.assertGreater(metrics['latency_ms']['max'], 0)
+            with self.assertRaises(ValueError):
+                await palettes.palette('#FFFF')
+            server = await service.serve_http(palettes, port=0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                self.assertEqual(
+                    await get(port, '/palette?color=%23FF0000&scheme=triad'),
+                    (200, dict(color='#FF0000',
+                               palette=[list(rows)
+                                        for rows in expected['#FF0000']])))
+                self.assertEqual(
+                    (await get(port, '/palette?color=nope'))[0], 400)
+                self.assertEqual((await get(port, '/nope'))[0], 404)
+                status, metrics = await get(port, '/metrics')
+                self.assertEqual(metrics['requests'], len(colors) + 1)
+
+        asyncio.run(run())
+
+    def test_catalog(self):
+        from random import Random
+        rnd = Random(0)
+        colors = ['#%06X' % rnd.randrange(1 << 24) for _ in range(3000)]
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'colors.csv')
+            path = os.path.join(tmp, 'colors.catalog')
+            with open(source, 'w') as f:
+                f.writelines('%s,color %d\n' % (color, i)
+                             for i, color in enumerate(colors))
+            result = CliRunner().invoke(
+                cli.main, ['build-catalog', source, path])
+            self.assertEqual(result.exit_code, 0, result.output)
+            colors_catalog = catalog.ColorCatalog.load(path)
+        self.assertEqual(len(colors_catalog), len(colors))
+        labs = [color_spaces.rgb8_to_lab(catalog.parse_hex(color))
+                for color in colors]
+        for _ in range(50):
+            query = '#%06X' % rnd.randrange(1 << 24)
+            lab = color_spaces.rgb8_to_lab(catalog.parse_hex(query))
+            expected = sorted(
+                (sum((x - y) ** 2 for x, y in zip(lab, other)), i)
+                for i, other in enumerate(labs))[:3]
+            self.assertEqual(
+                [match.name for match in colors_catalog.nearest(query, 3)],
+                ['color %d' % i for _, i in expected])
+
+        palette = color_scheme_generator.generate_palette(
+            color_scheme_generator.Color(hex='#FF5858'), 'triad')
+        snapped = color_scheme_generator.generate_palette(
+            color_scheme_generator.Color(hex='#FF5858'), 'triad',
+            catalog=colors_catalog)
+        self.assertEqual(
+            list(snapped.hex_values()),
+            [tuple(matches[0].hex for matches in row)
+             for row in colors_catalog.nearest_palette(palette)])
+        self.assertTrue(set(sum(snapped.hex_values(), ())) <= set(colors))
+
+    def test_image(self):
+        from random import Random
+        rnd = Random(0)
+        pixels = bytearray()
+        for _ in range(3000):
+            base = rnd.choice(((200, 40, 30),) * 3 + ((30, 60, 190),) * 2 +
+                              ((128, 128, 128),))
+            pixels += bytes(k + rnd.randrange(20) for k in base)
+        hues = image.dominant_hues(bytes(pixels), chunk_pixels=1000)
+        self.assertEqual([hue for hue, _ in hues], [3, 247])
+        self.assertEqual(round(sum(share for _, share in hues), 6), 1)
+        # alpha is ignored, python and numpy histograms agree
+        rgba = bytearray(4 * 3000)
+        for k in range(3):
+            rgba[k::4] = pixels[k::3]
+        chunks = list(image.iter_pixel_chunks(rgba, 4, 1000))
+        self.assertEqual(image._histogram_python(chunks, 4, 5),
+                         image.color_histogram([pixels]))
+        self.assertEqual(image.dominant_hues(rgba, depth=4), hues)
+
+        expected = paletton.Paletton().scheme(3, 'triad', 'pastel')
+        with tempfile.TemporaryDirectory() as tmp:
+            ppm = os.path.join(tmp, 'image.ppm')
+            with open(ppm, 'wb') as f:
+                f.write(b'P6\n# test\n60 50\n255\n' + pixels)
+            pam = os.path.join(tmp, 'image.pam')
+            with open(pam, 'wb') as f:
+                f.write(b'P7\nWIDTH 50\nHEIGHT 60\nDEPTH 4\nMAXVAL 255\n'
+                        b'TUPLTYPE RGB_ALPHA\nENDHDR\n' + rgba)
+            for path in (ppm, pam):
+                self.assertEqual(image.dominant_hues(path), hues)
+                palette = image.image_palette(path, 'triad')
+                self.assertEqual(
+                    list(palette.hex_values()),
+                    [tuple(tone.hex for tone in tones) for tones in expected])
+            result = CliRunner().invoke(cli.main, ['extract', ppm])
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertEqual(len(result.output.splitlines()), 2)
+            with open(ppm, 'r+b') as f:
+                f.truncate(100)
+            with self.assertRaises(ValueError):
+                image.dominant_hues(ppm)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestVectorized(unittest.TestCase):
+
+    def setUp(self):
+        rnd = numpy.random.RandomState(0)
+        self.colors = numpy.concatenate((
+            rnd.randint(0, 256, (2000, 3)),
+            [(0, 0, 0), (255, 255, 255), (128, 128, 128), (1, 0, 0)],
+        )).astype(numpy.uint8)
+
+    def test_variations_batch_matches_scalar(self):
+        presets = list(PRESETS_V3.values()) + list(PRESETS.values())
+        for preset in presets:
+            batch = vectorized.variations_batch(self.colors, preset)
+            for rgb, tones in zip(self.colors.tolist(), batch.tolist()):
+                sv_vars = paletton.make_sv_variations(rgb, preset)
+                expected = list(paletton.variations_generator(rgb, sv_vars))
+                self.assertEqual([tuple(t) for t in tones], expected)
+
+    def test_paletton_variations_batch(self):
+        p = paletton.Paletton()
+        self.assertEqual(p.variations_batch(self.colors).shape,
+                         (len(self.colors), 5, 3))
+        self.assertEqual(p.variations_batch(self.colors, 'pastel').tolist(),
+                         vectorized.variations_batch(
+                             self.colors, PRESETS_V3['pastel']).tolist())
+
+    def test_rgb_to_hue_batch_matches_scalar(self):
+        p = paletton.Paletton()
+        hues = p.rgb_to_hue_batch(self.colors).tolist()
+        expected = [paletton.from_rgb_to_paletton_hue(rgb, p)
+                    for rgb in self.colors.tolist()]
+        self.assertEqual(hues, expected)
+
+    def test_ryb_to_rgb_batch(self):
+        ryb = numpy.random.RandomState(1).rand(5000, 3)
+        expected = numpy.array([utils.ryb_to_rgb(*c) for c in ryb])
+        self.assertEqual(vectorized.ryb_to_rgb_batch(ryb).tolist(),
+                         expected.tolist())
+        error = abs(vectorized.ryb_to_rgb_lattice(ryb) - expected).max()
+        self.assertLess(error, 0.5 / 255)
+
+        colored = ryb[ryb.max(axis=1) > ryb.min(axis=1)]
+        expected = numpy.array(
+            [utils.ryb_to_rgb_nishita(*c) for c in colored])
+        numpy.testing.assert_allclose(
+            vectorized.ryb_to_rgb_nishita_batch(colored), expected)
+
+    def test_contrast(self):
+        Color = color_scheme_generator.Color
+        for rgb in self.colors[:200].tolist():
+            palette = color_scheme_generator.generate_palette(
+                Color(rgb=[k / 255 for k in rgb]), 'triad')
+            packed = numpy.frombuffer(palette.buffer(), numpy.uint32)
+            luminance = vectorized.relative_luminance_batch(packed)
+            self.assertEqual(luminance.tolist(), list(palette.luminance()))
+            matrix = palette.contrast_matrix()
+            expected = [[color_spaces.contrast_ratio(a, b) for b in luminance]
+                        for a in luminance]
+            numpy.testing.assert_allclose(matrix, expected)
+            self.assertAlmostEqual(palette.max_contrast(), matrix.max())
+            self.assertEqual(
+                sorted((min(i, j), max(i, j))
+                       for i, j, _ in palette.contrast_pairs(3)),
+                [(i, j) for i, j in zip(*numpy.nonzero(matrix >= 3))
+                 if i < j])
+            numpy.testing.assert_allclose(
+                palette.contrast_black_white(),
+                vectorized.black_white_contrast_batch(luminance))
+            kept = sum(palette.filter_contrast(4.5).hex_values(), ())
+            passing = vectorized.black_white_contrast_batch(
+                luminance).max(axis=1) >= 4.5
+            self.assertEqual(
+                kept, tuple(numpy.array(sum(palette.hex_values(), ()))[
+                    passing].tolist()))
+
+    def test_color_spaces_batch(self):
+        rgb = self.colors / 255
+        for batch, scalar, inverse in (
+                (vectorized.rgb_to_lab_batch, color_spaces.rgb_to_lab,
+                 vectorized.lab_to_rgb_batch),
+                (vectorized.rgb_to_oklab_batch, color_spaces.rgb_to_oklab,
+                 vectorized.oklab_to_rgb_batch)):
+            expected = numpy.array([scalar(c) for c in rgb.tolist()])
+            numpy.testing.assert_allclose(batch(rgb), expected, atol=1e-9)
+            # uint8 input goes through the lookup table
+            numpy.testing.assert_allclose(
+                batch(self.colors), expected, atol=1e-9)
+            numpy.testing.assert_allclose(inverse(expected), rgb, atol=1e-9)
+        for c in rgb[:100].tolist():
+            color = color_scheme_generator.Color(rgb=c)
+            numpy.testing.assert_allclose(
+                color.lab, color_spaces.rgb_to_lab(c))
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestHueTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, 'hues.bin')
+        runner = CliRunner()
+        result = runner.invoke(cli.main, ['build-hue-table', cls.path])
+        assert result.exit_code == 0, result.output
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def test_lookup(self):
+        from color_scheme_generator.hue_table import HueTable
+        p = paletton.Paletton()
+        colors = [(120, 0, 106), (0, 0, 255), (1, 2, 3), (255, 255, 255)]
+        with HueTable(self.path, COLOR_WHEEL_V3) as table:
+            self.assertEqual(
+                [table[rgb] for rgb in colors],
+                [paletton.from_rgb_to_paletton_hue(rgb, p) for rgb in colors])
+            self.assertEqual(table.lookup_batch(colors).tolist(),
+                             p.rgb_to_hue_batch(colors).tolist())
+
+    def test_wrong_color_wheel(self):
+        from color_scheme_generator.hue_table import HueTable
+        wheel = dict(COLOR_WHEEL_V3)
+        wheel[0] = (250, 0, 0)
+        self.assertRaises(ValueError, HueTable, self.path, wheel)
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())